@@ -0,0 +1,41 @@
+from django.db                    import Error
+from django.db.backends.mysql     import base
+
+Database = base.Database
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # CONN_MAX_AGE 로 유지하는 연결이 그 사이 끊겼을 수 있으니, 요청마다 처음 커서를 열 때 한 번 ping 으로 확인한다
+    health_check_done = False
+
+    @property
+    def health_check_enabled(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        if (
+            self.connection is None or
+            self.in_atomic_block or
+            not self.health_check_enabled or
+            self.health_check_done
+        ):
+            return
+
+        if not self.is_usable():
+            try:
+                self.close()
+            except Error:
+                self.connection = None
+
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
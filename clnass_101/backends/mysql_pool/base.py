@@ -0,0 +1,56 @@
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+
+from clnass_101.backends.mysql import base
+
+try:
+    from sqlalchemy import pool
+except ImportError as e:
+    raise ImproperlyConfigured(f'Error loading sqlalchemy module: {e}. Did you install SQLAlchemy?')
+
+Database = base.Database
+
+POOL_DEFAULTS = {
+    'POOL_SIZE'    : 5,
+    'MAX_OVERFLOW' : 10,
+    'TIMEOUT'      : 30,
+    'RECYCLE'      : 3600
+}
+
+_pools      = {}
+_pools_lock = threading.Lock()
+
+def get_pool(key, conn_params, options):
+    with _pools_lock:
+        if key not in _pools:
+            options     = {**POOL_DEFAULTS, **options}
+            _pools[key] = pool.QueuePool(
+                lambda: Database.connect(**conn_params),
+                pool_size    = options['POOL_SIZE'],
+                max_overflow = options['MAX_OVERFLOW'],
+                timeout      = options['TIMEOUT'],
+                recycle      = options['RECYCLE']
+            )
+
+        return _pools[key]
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # close() 는 연결을 끊지 않고 풀에 돌려준다. CONN_MAX_AGE 는 0 으로 두고 요청이 끝날 때마다 반납한다
+    def get_new_connection(self, conn_params):
+        key = (
+            self.alias,
+            conn_params.get('host'),
+            conn_params.get('port'),
+            conn_params.get('db'),
+            conn_params.get('user')
+        )
+        return get_pool(key, conn_params, self.settings_dict.get('POOL', {})).connect()
+
+    def is_usable(self):
+        if super().is_usable():
+            return True
+
+        # 끊긴 연결은 풀로 돌아가지 않게 버린다
+        self.connection.invalidate()
+        return False
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from contextlib  import contextmanager
+from contextvars import ContextVar
+
+from django.db                  import connections
+from django.db.backends.signals import connection_created
+
+# 요청마다 connection.execute_wrapper 를 거는 대신, 연결마다 한 번 훅을 걸고 관찰자는 ContextVar 로 넘긴다.
+# ContextVar 는 sync_to_async 로 넘어간 스레드까지 따라가므로 async 뷰의 쿼리도 같은 요청으로 집계된다
+_observers = ContextVar('query_observers', default=())
+
+def execute_hook(execute, sql, params, many, context):
+    observers = _observers.get()
+
+    if not observers:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+
+        for observer in observers:
+            observer(sql, params, duration)
+
+def install_execute_hook(sender, connection, **kwargs):
+    if execute_hook not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_hook)
+
+connection_created.connect(install_execute_hook)
+
+for connection in connections.all():
+    install_execute_hook(None, connection)
+
+@contextmanager
+def observe_queries(observer):
+    token = _observers.set(_observers.get() + (observer,))
+    try:
+        yield observer
+    finally:
+        _observers.reset(token)
+
+class QueryObserverMiddleware:
+    sync_capable  = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Django 가 이 미들웨어를 async 로 부르도록 표시한다 (MiddlewareMixin 과 같은 방식)
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def get_observer(self, request):
+        raise NotImplementedError
+
+    def process_response(self, request, response, observer):
+        return response
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        with observe_queries(self.get_observer(request)) as observer:
+            response = self.get_response(request)
+
+        return self.process_response(request, response, observer)
+
+    async def __acall__(self, request):
+        with observe_queries(self.get_observer(request)) as observer:
+            response = await self.get_response(request)
+
+        return self.process_response(request, response, observer)
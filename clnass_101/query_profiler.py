@@ -0,0 +1,76 @@
+import json
+import logging
+import re
+from collections import Counter
+
+from django.conf import settings
+
+from clnass_101.instrumentation import QueryObserverMiddleware
+
+logger = logging.getLogger(__name__)
+
+_in_list    = re.compile(r'IN \((?:%s, )*%s\)')
+_number     = re.compile(r'\b\d+\b')
+_whitespace = re.compile(r'\s+')
+
+class NPlusOneError(AssertionError):
+    pass
+
+def get_fingerprint(sql):
+    # 값만 다른 같은 모양의 쿼리를 하나로 묶는다. 파라미터는 이미 %s 로 분리되어 있다
+    sql = _whitespace.sub(' ', sql)
+    sql = _in_list.sub('IN (...)', sql)
+    return _number.sub('?', sql)
+
+class QueryProfiler:
+    def __init__(self):
+        self.count        = 0
+        self.duration     = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, sql, params, duration):
+        self.count             += 1
+        self.duration          += duration
+        self.fingerprints[sql] += 1
+
+    def get_repeated(self, threshold):
+        # 반복 INSERT/UPDATE 는 bulk 로 바꿀 대상이긴 하지만 N+1 로는 SELECT 만 본다
+        repeated = Counter()
+        for sql, count in self.fingerprints.items():
+            if sql.lstrip()[:6].upper() == 'SELECT':
+                repeated[get_fingerprint(sql)] += count
+
+        return {fingerprint: count for fingerprint, count in repeated.items() if count > threshold}
+
+class QueryProfilerMiddleware(QueryObserverMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.threshold   = settings.QUERY_PROFILER_REPEAT_THRESHOLD
+        self.raise_error = settings.QUERY_PROFILER_RAISE
+
+    def get_observer(self, request):
+        return QueryProfiler()
+
+    def process_response(self, request, response, profiler):
+        repeated = profiler.get_repeated(self.threshold)
+
+        if repeated and self.raise_error:
+            raise NPlusOneError(
+                f'{request.method} {request.path} repeated queries: {json.dumps(repeated, ensure_ascii=False)}'
+            )
+
+        if settings.DEBUG:
+            response['X-Query-Count']      = str(profiler.count)
+            response['X-Query-Time-Ms']    = f'{profiler.duration * 1000:.1f}'
+            response['X-Repeated-Queries'] = str(len(repeated))
+        elif repeated:
+            logger.warning(json.dumps({
+                'event'       : 'n_plus_one',
+                'method'      : request.method,
+                'path'        : request.path,
+                'query_count' : profiler.count,
+                'query_ms'    : round(profiler.duration * 1000, 1),
+                'repeated'    : repeated
+            }, ensure_ascii=False))
+
+        return response
@@ -10,9 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.1/ref/settings/
 """
 import os
+import sys
 
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 import my_settings
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -26,8 +29,41 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = my_settings.SECRET['secret']
 
 DATABASES = my_settings.DATABASES
+
+# 요청마다 MySQL 연결을 새로 맺지 않고 CONN_MAX_AGE 동안 재사용한다. 재사용 전에는 ping 으로 확인한다
+for database in DATABASES.values():
+    if database['ENGINE'] == 'django.db.backends.mysql':
+        database['ENGINE'] = 'clnass_101.backends.mysql'
+
+    database.setdefault('CONN_MAX_AGE', getattr(my_settings, 'CONN_MAX_AGE', 60))
+    database.setdefault('CONN_HEALTH_CHECKS', True)
+
+# my_settings.DATABASES 에 'replica' 가 있으면 목록/상세/검색/마이페이지 GET 의 읽기를 replica 로 보낸다
+if 'replica' in DATABASES:
+    DATABASES['replica'].setdefault('TEST', {'MIRROR': 'default'})
+    DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+
+REPLICA_STICKY_SECONDS = getattr(my_settings, 'REPLICA_STICKY_SECONDS', 5)
+
+# my_settings.DATABASE_POOL = {'POOL_SIZE': 5, 'MAX_OVERFLOW': 10} 이면 SQLAlchemy 커넥션 풀을 쓴다
+if getattr(my_settings, 'DATABASE_POOL', None):
+    DATABASES['default'].update(
+        ENGINE       = 'clnass_101.backends.mysql_pool',
+        CONN_MAX_AGE = 0,
+        POOL         = my_settings.DATABASE_POOL
+    )
+
+CACHES = getattr(my_settings, 'CACHES', {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+})
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = getattr(my_settings, 'DEBUG', True)
+
+# ETag 버전 토큰과 진도 하트비트 버퍼는 모든 워커가 같이 봐야 하므로 운영에서는 프로세스마다 따로인 LocMemCache 를 쓸 수 없다
+if not DEBUG and CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    raise ImproperlyConfigured('DEBUG = False requires a shared cache backend (e.g. Redis, Memcached) in CACHES')
 
 ALLOWED_HOSTS = ['*']
 
@@ -50,9 +86,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'core.replicas.PrimaryStickyMiddleware',
+    'clnass_101.sql_logging.SqlLoggingMiddleware',
+    'clnass_101.query_profiler.QueryProfilerMiddleware',
    # 'django.middleware.csrf.CsrfViewMiddleware',
    # 'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -157,6 +197,15 @@ AWS_SECRET_ACCESS_KEY   = my_settings.s3_config['secret_access_key']
 AWS_STORAGE_BUCKET_NAME = my_settings.s3_config['bucket_name']
 S3_BUCKET_URL           = f'https://{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com/'
 
+# 모든 쿼리를 남기면 부하가 커서, 느린 쿼리와 일부 표본만 sql.log 에 비동기로 남긴다
+SQL_LOG_SAMPLE_RATE = getattr(my_settings, 'SQL_LOG_SAMPLE_RATE', 0.001)
+SQL_SLOW_QUERY_MS   = getattr(my_settings, 'SQL_SLOW_QUERY_MS', 200)
+SQL_DEBUG_LOG       = getattr(my_settings, 'SQL_DEBUG_LOG', False)
+
+# 같은 모양의 쿼리가 한 요청에서 이 횟수보다 많이 실행되면 N+1 로 본다. 테스트에서는 예외로 실패시킨다
+QUERY_PROFILER_REPEAT_THRESHOLD = getattr(my_settings, 'QUERY_PROFILER_REPEAT_THRESHOLD', 10)
+QUERY_PROFILER_RAISE            = getattr(my_settings, 'QUERY_PROFILER_RAISE', 'test' in sys.argv)
+
 LOGGING = {
     'disable_existing_loggers': False,
     'version': 1,
@@ -178,11 +227,27 @@ LOGGING = {
             'formatter' : 'verbose',
             'filename'  : 'debug.log',
         },
+        'sql_file': {
+            'level'     : 'INFO',
+            'class'     : 'clnass_101.sql_logging.QueueFileHandler',
+            'formatter' : 'verbose',
+            'filename'  : 'sql.log',
+        },
     },
     'loggers': {
         'django.db.backends': {
             'handlers' : ['console','file'],
-            'level'    : 'DEBUG',
+            'level'    : 'DEBUG' if SQL_DEBUG_LOG else 'INFO',
+            'propagate': False,
+        },
+        'clnass_101.query_profiler': {
+            'handlers' : ['sql_file'],
+            'level'    : 'INFO',
+            'propagate': False,
+        },
+        'clnass_101.sql_logging': {
+            'handlers' : ['sql_file'],
+            'level'    : 'INFO',
             'propagate': False,
         },
     },
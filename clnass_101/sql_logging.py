@@ -0,0 +1,49 @@
+import atexit
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+
+from django.conf import settings
+
+from clnass_101.instrumentation import QueryObserverMiddleware
+
+logger = logging.getLogger(__name__)
+
+class QueueFileHandler(QueueHandler):
+    # 파일 쓰기는 별도 스레드의 QueueListener 가 하고, 요청 스레드는 큐에 넣기만 한다
+    def __init__(self, filename, encoding='UTF-8'):
+        super().__init__(queue.SimpleQueue())
+
+        self.listener = QueueListener(
+            self.queue, logging.FileHandler(filename, encoding=encoding), respect_handler_level=True
+        )
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+class QueryLogger:
+    def __init__(self, path, sample_rate, slow_query_seconds):
+        self.path               = path
+        self.sample_rate        = sample_rate
+        self.slow_query_seconds = slow_query_seconds
+
+    def __call__(self, sql, params, duration):
+        if duration >= self.slow_query_seconds:
+            logger.warning(
+                'slow query (%.1f ms) %s %s; params=%r',
+                duration * 1000, self.path, sql, params
+            )
+        elif self.sample_rate and random.random() < self.sample_rate:
+            logger.info(
+                'sampled query (%.1f ms) %s %s; params=%r',
+                duration * 1000, self.path, sql, params
+            )
+
+class SqlLoggingMiddleware(QueryObserverMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.sample_rate        = settings.SQL_LOG_SAMPLE_RATE
+        self.slow_query_seconds = settings.SQL_SLOW_QUERY_MS / 1000
+
+    def get_observer(self, request):
+        return QueryLogger(request.path, self.sample_rate, self.slow_query_seconds)
@@ -1,8 +1,14 @@
 from django.urls import path, include
 
+from order.views  import BatchOrderView
+from core.metrics import metrics_view
+
 urlpatterns = [
     path('user', include('user.urls')),
     path('products', include('product.urls')),
     path('products/<int:product_id>', include('order.urls')),
-    path('creator', include('creator.urls'))
+    path('orders/batch', BatchOrderView.as_view(), name='batch_order'),
+    path('creator', include('creator.urls')),
+    path('kits', include('kit.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
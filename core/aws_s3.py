@@ -3,6 +3,7 @@ import uuid
 import boto3
 
 from clnass_101     import settings
+from core.metrics   import observe_s3
 
 class S3FileManager:
     def __init__(self):
@@ -12,6 +13,7 @@ class S3FileManager:
             aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
         )
 
+    @observe_s3('upload')
     def file_upload(self, file, file_name):
         self.s3.upload_fileobj(
             file, 
@@ -20,6 +22,7 @@ class S3FileManager:
         )
         return file_name
 
+    @observe_s3('delete')
     def file_delete(self, file_name):
         self.s3.delete_object(
             Bucket=settings.AWS_STORAGE_BUCKET_NAME,
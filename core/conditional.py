@@ -0,0 +1,53 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http  import http_date, quote_etag
+
+class ConditionalGetMixin:
+    # get_version 은 응답 본문을 만들기 전에 싸게 계산할 수 있는 값만 돌려줘야 한다
+    def get_version(self, request, *args, **kwargs):
+        return None
+
+    def get_last_modified(self, request, *args, **kwargs):
+        return None
+
+    def on_not_modified(self, request, *args, **kwargs):
+        pass
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+
+        version = self.get_version(request, *args, **kwargs)
+
+        if version is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        etag          = make_etag(request, version)
+        last_modified = self.get_last_modified(request, *args, **kwargs)
+        timestamp     = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+        if response is not None:
+            self.on_not_modified(request, *args, **kwargs)
+        else:
+            response = super().dispatch(request, *args, **kwargs)
+
+            if response.status_code != 200:
+                return response
+
+        response['ETag'] = etag
+        if timestamp:
+            response['Last-Modified'] = http_date(timestamp)
+        patch_vary_headers(response, ['Authorization'])
+
+        return response
+
+def make_etag(request, version):
+    material = '|'.join([
+        request.get_full_path(),
+        request.headers.get('Authorization', ''),
+        *[str(value) for value in version]
+    ])
+    return quote_etag(hashlib.md5(material.encode('UTF-8')).hexdigest())
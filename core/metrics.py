@@ -0,0 +1,107 @@
+import os
+import time
+from functools import wraps
+
+from django.http import HttpResponse
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess
+)
+
+from clnass_101.instrumentation import QueryObserverMiddleware
+
+# gunicorn 처럼 워커가 여러 프로세스면 prometheus_multiproc_dir 환경 변수에 값 파일을 모아 /metrics 에서 합친다
+# prometheus-client 0.9.0 은 소문자 변수만 읽으므로 대문자 PROMETHEUS_MULTIPROC_DIR 은 보지 않는다
+MULTIPROC_DIR = os.environ.get('prometheus_multiproc_dir')
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Request latency by url name',
+    ['view', 'method', 'status']
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_duration_seconds',
+    'Time spent in database queries per request',
+    ['view']
+)
+REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Number of database queries per request',
+    ['view'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, float('inf'))
+)
+S3_LATENCY = Histogram(
+    's3_call_duration_seconds',
+    'Time spent in S3FileManager calls',
+    ['operation']
+)
+S3_ERRORS = Counter(
+    's3_call_errors',
+    'S3FileManager calls that raised',
+    ['operation']
+)
+
+class DatabaseTimer:
+    def __init__(self):
+        self.started  = time.perf_counter()
+        self.count    = 0
+        self.duration = 0.0
+
+    def __call__(self, sql, params, duration):
+        self.count    += 1
+        self.duration += duration
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+
+    if match is None:
+        return 'unresolved'
+
+    return match.url_name or match.route
+
+class MetricsMiddleware(QueryObserverMiddleware):
+    def get_observer(self, request):
+        return DatabaseTimer()
+
+    def process_response(self, request, response, timer):
+        view = get_view_name(request)
+
+        REQUEST_LATENCY.labels(view, request.method, response.status_code).observe(
+            time.perf_counter() - timer.started
+        )
+        REQUEST_DB_TIME.labels(view).observe(timer.duration)
+        REQUEST_DB_QUERIES.labels(view).observe(timer.count)
+
+        return response
+
+def observe_s3(operation):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                S3_ERRORS.labels(operation).inc()
+                raise
+            finally:
+                S3_LATENCY.labels(operation).observe(time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+def metrics_view(request):
+    registry = REGISTRY
+
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,58 @@
+from contextvars import ContextVar
+
+from django.conf              import settings
+from django.db                import DEFAULT_DB_ALIAS, connections
+from django.utils.deprecation import MiddlewareMixin
+
+REPLICA_DATABASE      = 'replica'
+PRIMARY_STICKY_COOKIE = 'use_primary'
+PRIMARY_STICKY_HEADER = 'X-Use-Primary'
+
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+class ReplicaRouter:
+    # 트랜잭션 안에서는 방금 쓴 값을 읽어야 하므로 replica 로 보내지 않는다
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return REPLICA_DATABASE
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+def is_primary_sticky(request):
+    return bool(
+        request.COOKIES.get(PRIMARY_STICKY_COOKIE) or
+        request.headers.get(PRIMARY_STICKY_HEADER)
+    )
+
+class ReplicaReadMixin:
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or is_primary_sticky(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        token = _read_from_replica.set(True)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _read_from_replica.reset(token)
+
+class PrimaryStickyMiddleware(MiddlewareMixin):
+    # 쓰기 요청이 성공하면 replica 가 따라잡을 때까지 같은 클라이언트의 읽기를 primary 로 보낸다
+    def process_response(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            response.set_cookie(
+                PRIMARY_STICKY_COOKIE,
+                '1',
+                max_age  = settings.REPLICA_STICKY_SECONDS,
+                httponly = True
+            )
+            response[PRIMARY_STICKY_HEADER] = str(settings.REPLICA_STICKY_SECONDS)
+
+        return response
@@ -0,0 +1,80 @@
+import contextvars
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http                  import HttpResponse, StreamingHttpResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+STREAM_BUFFER_SIZE = 100
+
+_encoder = DjangoJSONEncoder()
+
+def to_json_value(value):
+    # Decimal, datetime, date, UUID 을 JsonResponse(DjangoJSONEncoder) 와 같은 문자열로 바꾼다
+    return _encoder.default(value)
+
+if orjson:
+    def dumps(data):
+        return orjson.dumps(
+            data,
+            default = to_json_value,
+            option  = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        )
+else:
+    def dumps(data):
+        return json.dumps(
+            data,
+            default      = to_json_value,
+            ensure_ascii = False,
+            separators   = (',', ':')
+        ).encode('UTF-8')
+
+class FastJsonResponse(HttpResponse):
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError('In order to allow non-dict objects to be serialized set the safe parameter to False.')
+
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
+
+class StreamingJsonResponse(StreamingHttpResponse):
+    def __init__(self, items, key, extra=None, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(
+            streaming_content=run_in_context(stream_json(items, key, extra), contextvars.copy_context()),
+            **kwargs
+        )
+
+def run_in_context(chunks, context):
+    # 본문은 뷰와 미들웨어가 끝난 뒤에 꺼내지므로, 만들 때의 ContextVar(replica 읽기, 쿼리 관찰자)로 되돌려 실행한다
+    while True:
+        try:
+            yield context.run(next, chunks)
+        except StopIteration:
+            return
+
+def stream_json(items, key, extra=None):
+    # {"key":[item,item,...],"extra":...} 를 STREAM_BUFFER_SIZE 개씩 묶어서 내보낸다
+    buffer = [b'{' + dumps(key) + b':[']
+    first  = True
+
+    for item in items:
+        buffer.append(dumps(item) if first else b',' + dumps(item))
+        first = False
+
+        if len(buffer) >= STREAM_BUFFER_SIZE:
+            yield b''.join(buffer)
+            buffer = []
+
+    buffer.append(b']')
+
+    for extra_key, value in (extra or {}).items():
+        buffer.append(b',' + dumps(extra_key) + b':' + dumps(value))
+
+    buffer.append(b'}')
+
+    yield b''.join(buffer)
@@ -2,35 +2,57 @@ import jwt
 import bcrypt
 import re
 import uuid
+import asyncio
 
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+
+from django.http                import JsonResponse
+from django.db.models           import Count, Subquery
+from django.db.models.functions import Coalesce
 
 from my_settings import SECRET, ALGORITHM
 from user.models import User
 
+def authenticate(request, login_required):
+    try:
+        token = request.headers.get('Authorization', None)
+        
+        if not token and not login_required:
+            request.user = User.objects.filter(id=0)
+            return None
+        
+        payload = jwt.decode(
+            token,
+            SECRET['secret'],
+            algorithm=ALGORITHM['algorithm']
+        )
+        user = User.objects.get(id=payload['user_id'])
+        request.user = user
+
+    except jwt.exceptions.DecodeError:
+        return JsonResponse({"MESSAGE": "INVALID_TOKEN"}, status=400)
+
+    except User.DoesNotExist:
+        return JsonResponse({"MESSAGE": "INVALID_USER"}, status=401)
+
 def login_decorator(login_required=True):
     def real_decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            async def async_wrapper(self, request, *args, **kwargs):
+                error = await sync_to_async(authenticate, thread_sensitive=True)(request, login_required)
+
+                if error is not None:
+                    return error
+
+                return await func(self, request, *args, **kwargs)
+
+            return async_wrapper
+
         def wrapper(self, request, *args, **kwargs):
-            try:
-                token = request.headers.get('Authorization', None)
-                
-                if not token and not login_required:
-                    request.user = User.objects.filter(id=0)
-                    return func(self, request, *args, **kwargs)
-                
-                payload = jwt.decode(
-                    token,
-                    SECRET['secret'],
-                    algorithm=ALGORITHM['algorithm']
-                )
-                user = User.objects.get(id=payload['user_id'])
-                request.user = user
-
-            except jwt.exceptions.DecodeError:
-                return JsonResponse({"MESSAGE": "INVALID_TOKEN"}, status=400)
-
-            except User.DoesNotExist:
-                return JsonResponse({"MESSAGE": "INVALID_USER"}, status=401)
+            error = authenticate(request, login_required)
+
+            if error is not None:
+                return error
 
             return func(self, request, *args, **kwargs)
 
@@ -38,6 +60,63 @@ def login_decorator(login_required=True):
 
     return real_decorator
 
+def as_async_view(view_class, **initkwargs):
+    # Django 3.1 은 함수형 async 뷰만 await 하고, 클래스 뷰의 async 핸들러는 4.1 부터 지원한다.
+    # async 로 만든 핸들러는 이벤트 루프에서 바로 부르고, 나머지 메서드는 기존 sync 뷰를 DB 스레드에서 실행한다
+    sync_view = sync_to_async(view_class.as_view(**initkwargs), thread_sensitive=True)
+
+    async def view(request, *args, **kwargs):
+        method  = request.method.lower()
+        handler = getattr(view_class, method, None) if method in view_class.http_method_names else None
+
+        if not asyncio.iscoroutinefunction(handler):
+            return await sync_view(request, *args, **kwargs)
+
+        self = view_class(**initkwargs)
+        self.setup(request, *args, **kwargs)
+
+        return await getattr(self, method)(request, *args, **kwargs)
+
+    view.view_class = view_class
+
+    return view
+
+def get_token_user_id(request):
+    token = request.headers.get('Authorization', None)
+
+    if not token:
+        return None
+
+    try:
+        return jwt.decode(
+            token,
+            SECRET['secret'],
+            algorithm=ALGORITHM['algorithm']
+        )['user_id']
+    except (jwt.exceptions.DecodeError, KeyError):
+        return None
+
+def get_requested_fields(request, available):
+    fields = request.GET.get('fields')
+
+    if not fields:
+        return list(available)
+
+    requested = set(fields.split(','))
+
+    if not requested <= set(available):
+        raise ValueError
+
+    return [field for field in available if field in requested]
+
+def get_projected_queryset(queryset, fields, table):
+    # table 은 {응답 키: ([필요한 컬럼], 직렬화 함수)} 형태
+    columns = {'id'}.union(*[table[field][0] for field in fields])
+
+    return queryset.select_related(
+        *{column.rsplit('__', 1)[0] for column in columns if '__' in column}
+    ).only(*columns)
+
 def get_hashed_pw(password):
     return bcrypt.hashpw(password.encode("UTF-8"), bcrypt.gensalt()).decode("UTF-8")
 
@@ -59,3 +138,10 @@ def issue_token(user_id):
 def random_number_generator():
     return str(uuid.uuid4())
 
+def count_subquery(queryset, group_by):
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(group_by).annotate(count=Count('id')).values('count')[:1]
+        ),
+        0
+    )
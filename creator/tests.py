@@ -1,9 +1,11 @@
 import json
 import io
+import asyncio
+import threading
 from unittest       import mock
 
 from django.test    import Client, TransactionTestCase
-from django.urls    import reverse
+from django.urls    import resolve, reverse
 from django.db      import connection
 
 from product.models import MainCategory, SubCategory, Difficulty
@@ -110,6 +112,40 @@ class TestFirstTemporaryView(TransactionTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(json.loads(response.content)['message'], 'SUCCESS')
 
+    @mock.patch('creator.views.S3FileManager')
+    def test_first_temporary_view_uploads_off_the_event_loop(self, mock_S3FileManager):
+        threads = {}
+
+        def file_upload(file, file_name):
+            threads['upload'] = threading.get_ident()
+            return file_name
+
+        def get_difficulty(*args, **kwargs):
+            threads['database'] = threading.get_ident()
+            return get(*args, **kwargs)
+
+        mock_S3FileManager().file_upload.side_effect = file_upload
+        get = Difficulty.objects.get
+
+        data = {
+            'body'  : json.dumps({
+                "categoryName"    : "크리에이티브",
+                "subCategoryName" : "데이터/개발",
+                "difficultyName"  : "초급자",
+                "name"            : "강의1",
+                "price"           : 10,
+                "sale"            : 0.35
+            }),
+            'files' : [io.BytesIO(b'image1')]
+        }
+
+        with mock.patch.object(Difficulty.objects, 'get', side_effect=get_difficulty):
+            response = self.client.post(reverse('first_temporary', args=[1]), data, **self.header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(asyncio.iscoroutinefunction(resolve(reverse('first_temporary', args=[1])).func))
+        self.assertNotEqual(threads['upload'], threads['database'])
+
     @mock.patch('creator.views.S3FileManager')
     def test_first_temporary_view_fail_key_error(self, mock_S3FileManager):
         mock_S3FileManager().file_upload.side_effect = ['image_url1', 'image_url2']
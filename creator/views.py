@@ -1,9 +1,11 @@
 import json
 
+from asgiref.sync           import sync_to_async
+
 from django.http            import JsonResponse
 from django.views           import View
 from django.db              import transaction
-from django.db.models       import Q
+from django.db.models       import Q, Count, Max
 from django.utils           import timezone
 from django.core.exceptions import ObjectDoesNotExist
 
@@ -33,10 +35,214 @@ from product.models      import (
                         )
 from kit.models          import Kit, KitSubImageUrl
 from core                import S3FileManager, random_number_generator
-from core.utils          import login_decorator
+from core.utils          import login_decorator, get_token_user_id
+from core.conditional    import ConditionalGetMixin
 from clnass_101.settings import S3_BUCKET_URL
 
-class FirstTemporaryView(View):
+def get_rows_version(queryset):
+    version = queryset.aggregate(last_id=Max('id'), count=Count('id'))
+    return (version['last_id'], version['count'])
+
+# S3 전송은 이벤트 루프를 막지 않도록 스레드 풀(thread_sensitive=False)에서 하고,
+# DB 작업은 DB 전용 스레드(thread_sensitive=True)에서 짧은 atomic 블록 하나로 묶는다
+@sync_to_async(thread_sensitive=False)
+def upload_files(uploads):
+    return [
+        S3FileManager().file_upload(file, prefix + random_number_generator()) for file, prefix in uploads
+    ]
+
+@sync_to_async(thread_sensitive=False)
+def delete_files(file_names):
+    for file_name in file_names:
+        S3FileManager().file_delete(file_name)
+
+async def save_uploaded(save, urls, *args):
+    # 저장이 실패하면 방금 올린 파일을 지우고, 성공하면 교체된 옛 파일을 커밋 후에 지운다
+    try:
+        old_urls = await sync_to_async(save, thread_sensitive=True)(*args, urls)
+    except Exception:
+        await delete_files(urls)
+        raise
+
+    await delete_files(old_urls)
+
+@sync_to_async(thread_sensitive=True)
+def temporary_product_exists(temporary_id):
+    return TemporaryProduct.objects.filter(id=temporary_id).exists()
+
+@sync_to_async(thread_sensitive=True)
+def get_first_step_lookups(data):
+    # 프론트측의 요청으로 아이디가 아닌 name으로 판별
+    return {
+        'main_category' : MainCategory.objects.get(name=data['categoryName']),
+        'sub_category'  : SubCategory.objects.get(name=data['subCategoryName']),
+        'difficulty'    : Difficulty.objects.get(name=data['difficultyName'])
+    }
+
+@transaction.atomic
+def save_first_step(user, temporary_id, defaults, urls):
+    temp = TemporaryProduct.objects.update_or_create(
+        id              = temporary_id,
+        user            = user,
+        defaults        = defaults
+    )[0]
+    
+    # 기존 이미지 삭제
+    exist_images = TemporaryProductImage.objects.filter(temporary_product=temp)
+    old_urls     = [image.image_url for image in exist_images]
+    exist_images.delete()
+     
+    # 이미지 삽입
+    TemporaryProductImage.objects.bulk_create([
+        TemporaryProductImage(temporary_product=temp, image_url=url) for url in urls
+    ])
+
+    return old_urls
+
+@transaction.atomic
+def save_second_step(temporary_id, chapters, urls):
+    # 기존 이미지 삭제
+    temps    = TemporaryChapter.objects.filter(temporary_product_id=temporary_id)
+    old_urls = [temp.thumbnail_image for temp in temps if temp.thumbnail_image]
+    temps.delete()
+
+    lectures = []
+    for i, chapter in enumerate(chapters, start=1):
+        temp = TemporaryChapter.objects.create(
+            temporary_product_id = temporary_id,
+            order                = i,
+            name                 = chapter['name'],
+            thumbnail_image      = urls[i - 1] if i <= len(urls) else None
+        )
+        
+        lectures += [{
+            'name'       : lecture.get('name'),
+            'chapter'    : temp.name,
+            'chapter_id' : temp.id
+        } for lecture in chapter['lectures']]
+    
+    # 다음 chapter로 바뀌면 order를 1로 변환
+    order        = 1
+    chapter_name = None
+    for lecture in lectures:
+        if lecture['chapter'] != chapter_name:
+            order = 1
+        chapter_name = lecture['chapter']
+
+        TemporaryLecture.objects.create(
+            temporary_product_id = temporary_id,
+            temporary_chapter_id = lecture['chapter_id'],
+            order                = order,
+            name                 = lecture['name']
+        )
+        order += 1
+
+    return old_urls
+
+@sync_to_async(thread_sensitive=True)
+def temporary_lectures_exist(lecture_ids):
+    return TemporaryLecture.objects.filter(id__in=lecture_ids).count() == len(set(lecture_ids))
+
+def get_third_step_uploads(lectures, videos, images):
+    # 강의마다 비디오 하나, 글마다 이미지 하나씩 요청에 실린 순서대로 짝짓는다
+    uploads = []
+    for index, lecture in enumerate(lectures):
+        if videos:
+            uploads.append(((index, None), videos.pop(0), 'videos/'))
+
+        for i, _ in enumerate(lecture['contents'], start=1):
+            if images:
+                uploads.append(((index, i), images.pop(0), 'images/'))
+
+    return uploads
+
+@transaction.atomic
+def save_third_step(temporary_id, lectures, keys, urls):
+    uploaded_urls = dict(zip(keys, urls))
+
+    temp =  TemporaryProduct.objects.prefetch_related(
+        'temporarylecturecontentimage_set'
+    ).get(id=temporary_id)
+
+    # 기존 이미지 제거
+    old_urls = [image.image_url for image in temp.temporarylecturecontentimage_set.all()]
+    temp.temporarylecturecontentimage_set.all().delete()
+        
+    # 기존 글 제거
+    temp.temporarylecturecontentdescription_set.all().delete()
+        
+    # 기존 글그림 연결 제거
+    temp.temporarylecturecontent_set.all().delete()
+
+    image = None
+    for index, lecture in enumerate(lectures):
+        temp = TemporaryLecture.objects.get(id=lecture['lecture_id'])
+
+        # 비디오 교체
+        if (index, None) in uploaded_urls:
+            if temp.video_url:
+                old_urls.append(temp.video_url)
+
+            temp.video_url = uploaded_urls[(index, None)]
+            temp.save()
+    
+        for i, content in enumerate(lecture['contents'], start=1):
+            # 이미지 생성
+            if (index, i) in uploaded_urls:
+                image = TemporaryLectureContentImage.objects.create(
+                    temporary_lecture    = temp,
+                    image_url            = uploaded_urls[(index, i)],
+                    temporary_product_id = temporary_id
+                )
+                
+            # 글생성
+            description = TemporaryLectureContentDescription.objects.create(
+                temporary_lecture    = temp,
+                description          = content['description'],
+                temporary_product_id = temporary_id
+            )
+            
+            # 글 그림 연결
+            TemporaryLectureContent.objects.create(
+                order                = i,
+                image                = image,
+                description          = description,
+                temporary_lecture    = temp,
+                temporary_product_id = temporary_id
+            )
+
+    return old_urls
+
+@transaction.atomic
+def save_fourth_step(temporary_id, kits, urls):
+    # 기존 이미지 삭제
+    old_urls = list(TemporaryKitImage.objects.filter(
+        temporary_kit__temporary_product_id=temporary_id
+    ).values_list('image_url', flat=True))
+
+    # 기존 키트 삭제
+    TemporaryKit.objects.filter(temporary_product_id=temporary_id).delete()
+    
+    # 키트 생성
+    for index, kit in enumerate(kits):
+        temp = TemporaryKit.objects.create(name=kit, temporary_product_id=temporary_id)
+
+        if index < len(urls):
+            TemporaryKitImage.objects.create(image_url=urls[index], temporary_kit=temp, temporary_product_id=temporary_id)
+
+    return old_urls
+
+class FirstTemporaryView(ConditionalGetMixin, View):
+    def get_version(self, request, temporary_id):
+        temp_version = TemporaryProduct.objects.filter(
+            id=temporary_id, user_id=get_token_user_id(request)
+        ).values_list('updated_at', flat=True).first()
+
+        return (
+            temp_version,
+            *get_rows_version(TemporaryProductImage.objects.filter(temporary_product_id=temporary_id))
+        )
+
     @login_decorator()
     def get(self, request, temporary_id):
         user       = request.user 
@@ -74,46 +280,20 @@ class FirstTemporaryView(View):
             'temporaryInformation' : temp_info}, status=200)
     
     @login_decorator()
-    @transaction.atomic
-    def post(self, request, temporary_id):
+    async def post(self, request, temporary_id):
         try:
             data   = json.loads(request.POST['body'])
-            user   = request.user
             images = request.FILES.getlist('files') 
 
-            # 프론트측의 요청으로 아이디가 아닌 name으로 판별
-            category     = MainCategory.objects.get(name=data['categoryName'])
-            sub_category = SubCategory.objects.get(name=data['subCategoryName'])
-            difficulty   = Difficulty.objects.get(name=data['difficultyName'])
-
-            temp = TemporaryProduct.objects.update_or_create(
-                id              = temporary_id,
-                user            = user,
-                defaults        = {
-                    'main_category' : category,
-                    'sub_category'  : sub_category,
-                    'name'          : data['name'],
-                    'price'         : data['price'],
-                    'sale'          : data['sale'],
-                    'difficulty'    : difficulty
-                }
-            )[0]
-            
-            # 기존 이미지 삭제
-            exist_images = TemporaryProductImage.objects.filter(temporary_product=temp)
-            for image in exist_images:
-                url = image.image_url
-                S3FileManager().file_delete(url)
-                image.delete()
-             
-            # 이미지 삽입
-            for image in images:
-                file_name = 'images/' + random_number_generator()
-                url = S3FileManager().file_upload(image, file_name)
-                TemporaryProductImage.objects.create(
-                    temporary_product = temp,
-                    image_url         = url
-                )
+            defaults = {
+                **await get_first_step_lookups(data),
+                'name'          : data['name'],
+                'price'         : data['price'],
+                'sale'          : data['sale']
+            }
+            urls     = await upload_files([(image, 'images/') for image in images])
+
+            await save_uploaded(save_first_step, urls, request.user, temporary_id, defaults)
 
             return JsonResponse({'message':'SUCCESS'}, status=200)
 
@@ -122,7 +302,13 @@ class FirstTemporaryView(View):
         except KeyError:
             return JsonResponse({'message':'KEY_ERROR'}, status=400)
 
-class SecondTemporaryView(View):
+class SecondTemporaryView(ConditionalGetMixin, View):
+    def get_version(self, request, temporary_id):
+        return (
+            *get_rows_version(TemporaryChapter.objects.filter(temporary_product_id=temporary_id)),
+            *get_rows_version(TemporaryLecture.objects.filter(temporary_product_id=temporary_id))
+        )
+
     @login_decorator()
     def get(self, request, temporary_id):
         chapters = TemporaryChapter.objects.filter(temporary_product_id=temporary_id).prefetch_related('temporarylecture_set')
@@ -140,68 +326,33 @@ class SecondTemporaryView(View):
         }, status=200)
     
     @login_decorator()
-    @transaction.atomic
-    def post(self, request, temporary_id):
+    async def post(self, request, temporary_id):
         try:
             data = json.loads(request.POST['body'])
             images = request.FILES.getlist('files')
 
-            if not TemporaryProduct.objects.filter(id=temporary_id).exists():
+            if not await temporary_product_exists(temporary_id):
                 return JsonResponse({'message':'TEMPORARY_PRODUCT_DOES_NOT_EXIST'}, status=404)
 
             chapters = data['chapters']
-            
-            temps = TemporaryChapter.objects.filter(temporary_product_id=temporary_id)
-            for temp in temps:
-                # 기존 이미지 삭제
-                if temp.thumbnail_image:
-                    url = temp.thumbnail_image
-                    S3FileManager().file_delete(url)
-                temp.delete()
-
-            lectures = []
-            for i, chapter in enumerate(chapters, start=1):
-                temp = TemporaryChapter.objects.create(
-                    temporary_product_id = temporary_id,
-                    order                = i,
-                    name                 = chapter['name'] 
-                )
-                
-                if images:
-                    image = images.pop(0)
-                    file_name = 'images/' + random_number_generator()
-                    url       = S3FileManager().file_upload(image, file_name)
-                    temp.thumbnail_image = url 
-                    temp.save()
-                
-                lectures += [{
-                    'name'       : lecture.get('name'),
-                    'chapter'    : temp.name,
-                    'chapter_id' : temp.id
-                } for lecture in chapter['lectures']]
-            
-            # 다음 chapter로 바뀌면 order를 1로 변환
-            order        = 1
-            chapter_name = None
-            for lecture in lectures:
-                if lecture['chapter'] != chapter_name:
-                    order = 1
-                chapter_name = lecture['chapter']
-
-                TemporaryLecture.objects.create(
-                    temporary_product_id = temporary_id,
-                    temporary_chapter_id = lecture['chapter_id'],
-                    order                = order,
-                    name                 = lecture['name']
-                )
-                order += 1
+            urls     = await upload_files([(image, 'images/') for image in images[:len(chapters)]])
+
+            await save_uploaded(save_second_step, urls, temporary_id, chapters)
 
             return JsonResponse({'message':'SUCCESS'}, status=200)
 
         except KeyError:
             return JsonResponse({'message':'KEY_ERROR'}, status=400)
 
-class ThirdTemporaryView(View):
+class ThirdTemporaryView(ConditionalGetMixin, View):
+    def get_version(self, request, temporary_id):
+        return (
+            *TemporaryLecture.objects.filter(
+                temporary_product_id=temporary_id
+            ).order_by('id').values_list('id', 'video_url'),
+            *get_rows_version(TemporaryLectureContent.objects.filter(temporary_product_id=temporary_id))
+        )
+
     @login_decorator()
     def get(self, request, temporary_id):
         chapters = TemporaryChapter.objects.filter(temporary_product_id=temporary_id).prefetch_related(
@@ -230,88 +381,37 @@ class ThirdTemporaryView(View):
         })
     
     @login_decorator()
-    @transaction.atomic
-    def post(self, request, temporary_id):
+    async def post(self, request, temporary_id):
         try:
             data = json.loads(request.POST['body'])
 
-            if not TemporaryProduct.objects.filter(id=temporary_id).exists():
+            if not await temporary_product_exists(temporary_id):
                 return JsonResponse({'message':'TEMPORARY_PRODUCT_DOES_NOT_EXIST'}, status=404)
             
-            for lecture in data['lectures']:
-                if not TemporaryLecture.objects.filter(id=lecture['lecture_id']).exists():
-                    return JsonResponse({'message':'TEMPORARY_LECTURE_DOES_NOT_EXIST'}, status=404)
-
-            temp =  TemporaryProduct.objects.prefetch_related(
-                'temporarylecturecontent_set',
-                'temporarylecturecontentimage_set', 
-                'temporarylecturecontentdescription_set'
-            ).get(id=temporary_id)
-
-            # 기존 이미지 제거
-            images = temp.temporarylecturecontentimage_set.all()
-            for image in images:
-                S3FileManager().file_delete(image.image_url)
-                image.delete()
-                
-            # 기존 글 제거
-            temp.temporarylecturecontentdescription_set.all().delete()
-                
-            # 기존 글그림 연결 제거
-            temp.temporarylecturecontent_set.all().delete()
-                
-            videos = request.FILES.getlist('videos')
-            images = request.FILES.getlist('images')
+            lectures = data['lectures']
 
-            for lecture in data['lectures']:
-                temp      = TemporaryLecture.objects.get(id=lecture['lecture_id'])
+            if not await temporary_lectures_exist([lecture['lecture_id'] for lecture in lectures]):
+                return JsonResponse({'message':'TEMPORARY_LECTURE_DOES_NOT_EXIST'}, status=404)
+
+            uploads = get_third_step_uploads(
+                lectures, request.FILES.getlist('videos'), request.FILES.getlist('images')
+            )
+            urls    = await upload_files([(file, prefix) for _, file, prefix in uploads])
+
+            await save_uploaded(save_third_step, urls, temporary_id, lectures, [key for key, _, _ in uploads])
 
-                # 기존 비디오 제거
-                if temp.video_url:
-                    url = temp.video_url
-                    S3FileManager().file_delete(url)
-                
-                # 비디오 삽입
-                if videos:
-                    video          = videos.pop(0)
-                    file_name      = 'videos/' + random_number_generator()
-                    url            = S3FileManager().file_upload(video, file_name)
-                    temp.video_url = url
-                    temp.save()
-            
-                for i, content in enumerate(lecture['contents'], start=1):
-                    # 이미지 생성
-                    if images:
-                        image     = images.pop(0)
-                        file_name = 'images/' + random_number_generator()
-                        url       = S3FileManager().file_upload(image, file_name)
-                        image     = TemporaryLectureContentImage.objects.create(
-                            temporary_lecture    = temp,
-                            image_url            = url,
-                            temporary_product_id = temporary_id
-                        )
-                        
-                    # 글생성
-                    description = TemporaryLectureContentDescription.objects.create(
-                        temporary_lecture    = temp,
-                        description          = content['description'],
-                        temporary_product_id = temporary_id
-                    )
-                    
-                    # 글 그림 연결
-                    TemporaryLectureContent.objects.create(
-                        order                = i,
-                        image                = image,
-                        description          = description,
-                        temporary_lecture    = temp,
-                        temporary_product_id = temporary_id
-                    )
             return JsonResponse({'message':'SUCCESS'},status=200)
 
         except KeyError:
             return JsonResponse({'message':'KEY_ERROR'}, status=400)
 
-class FourthTemporaryView(View):
+class FourthTemporaryView(ConditionalGetMixin, View):
+    def get_version(self, request, temporary_id):
+        return (
+            *get_rows_version(TemporaryKit.objects.filter(temporary_product_id=temporary_id)),
+            *get_rows_version(TemporaryKitImage.objects.filter(temporary_product_id=temporary_id))
+        )
+
     @login_decorator()
     def get(self, request, temporary_id):
         kits = TemporaryKit.objects.filter(temporary_product_id=temporary_id).prefetch_related('temporarykitimage_set')
@@ -325,33 +425,18 @@ class FourthTemporaryView(View):
             })
 
     @login_decorator()
-    @transaction.atomic
-    def post(self, request, temporary_id):
+    async def post(self, request, temporary_id):
         try:
-            if not TemporaryProduct.objects.filter(id=temporary_id).exists():
+            if not await temporary_product_exists(temporary_id):
                 return JsonResponse({'message':'TEMPORARY_PRODUCT_DOES_NOT_EXIST'}, status=404)
 
             data = json.loads(request.POST['body'])
             images = request.FILES.getlist('files')
 
-            # 기존 이미지 삭제
-            temp_images = TemporaryKitImage.objects.filter(temporary_kit__temporary_product_id=temporary_id)
-            for image in temp_images:
-                S3FileManager().file_delete(image.image_url)
-
-            # 기존 키트 삭제
-            TemporaryKit.objects.filter(temporary_product_id=temporary_id).delete()
-            
-            # 키트 생성
             kits = [kit.get('name') for kit in data['kits']]
-            for kit in kits:
-                temp = TemporaryKit.objects.create(name=kit, temporary_product_id=temporary_id)
-
-                if images:
-                    image = images.pop(0)
-                    file_name = 'images/' + random_number_generator()
-                    url       = S3FileManager().file_upload(image, file_name)
-                    TemporaryKitImage.objects.create(image_url=url, temporary_kit=temp, temporary_product_id=temporary_id)
+            urls = await upload_files([(image, 'images/') for image in images[:len(kits)]])
+
+            await save_uploaded(save_fourth_step, urls, temporary_id, kits)
 
             return JsonResponse({'message':'SUCCESS'}, status=200)
         
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch          import receiver
+from django.core.cache        import cache
+
+from kit.models import Kit, KitSubImageUrl
+from kit.views  import get_kit_cache_key
+
+@receiver(post_save, sender=Kit)
+@receiver(post_delete, sender=Kit)
+def invalidate_kit(sender, instance, **kwargs):
+    cache.delete(get_kit_cache_key(instance.id))
+
+@receiver(post_save, sender=KitSubImageUrl)
+@receiver(post_delete, sender=KitSubImageUrl)
+def invalidate_kit_sub_image(sender, instance, **kwargs):
+    cache.delete(get_kit_cache_key(instance.kit_id))
@@ -1,3 +1,64 @@
-from django.test import TestCase
+from django.test       import Client, TransactionTestCase
+from django.urls       import reverse
+from django.db         import connection
+from django.core.cache import cache
 
-# Create your tests here.
+from kit.models import Kit, KitSubImageUrl
+
+class TestKitDetailView(TransactionTestCase):
+
+    def setUp(self):
+        self.client = Client()
+
+        self.kit = Kit.objects.create(
+            name           = 'test_kit',
+            main_image_url = 'image_url',
+            price          = 10000,
+            description    = 'test_description'
+        )
+
+        for i in range(3):
+            KitSubImageUrl.objects.create(
+                image_url = 'sub_image_url' + str(i),
+                kit       = self.kit
+            )
+
+    def tearDown(self):
+        cache.clear()
+
+        with connection.cursor() as cursor:
+            cursor.execute('set foreign_key_checks=0')
+            cursor.execute('truncate kits')
+            cursor.execute('truncate kit_sub_image_urls')
+            cursor.execute('set foreign_key_checks=1')
+
+    def test_kit_detail_get_success(self):
+        response = self.client.get(reverse('kits', args=[self.kit.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['KIT']['kitName'], 'test_kit')
+        self.assertEqual(len(response.json()['KIT']['subImageUrls']), 3)
+
+    def test_kit_detail_get_fail_kit_not_exist(self):
+        response = self.client.get(reverse('kits', args=[100]))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['MESSAGE'], 'KIT_NOT_EXIST')
+
+    def test_kit_detail_is_cached(self):
+        self.client.get(reverse('kits', args=[self.kit.id]))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('kits', args=[self.kit.id]))
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_kit_detail_cache_invalidated_on_update(self):
+        self.client.get(reverse('kits', args=[self.kit.id]))
+
+        self.kit.name = 'changed_kit'
+        self.kit.save()
+
+        response = self.client.get(reverse('kits', args=[self.kit.id]))
+
+        self.assertEqual(response.json()['KIT']['kitName'], 'changed_kit')
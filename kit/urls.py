@@ -0,0 +1,7 @@
+from django.urls import path
+
+from kit.views import KitDetailView
+
+urlpatterns = [
+    path('/<int:kit_id>', KitDetailView.as_view(), name='kits'),
+]
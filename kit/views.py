@@ -1,3 +1,35 @@
-from django.shortcuts import render
+from django.views      import View
+from django.http       import JsonResponse
+from django.core.cache import cache
 
-# Create your views here.
+from kit.models import Kit
+
+KIT_CACHE_TIMEOUT = 60 * 10
+
+def get_kit_cache_key(kit_id):
+    return f'kit:{kit_id}'
+
+class KitDetailView(View):
+    def get(self, request, kit_id):
+        cache_key = get_kit_cache_key(kit_id)
+        kit_info  = cache.get(cache_key)
+
+        if kit_info is None:
+            try:
+                kit = Kit.objects.prefetch_related('kitsubimageurl_set').get(id=kit_id)
+            except Kit.DoesNotExist:
+                return JsonResponse({'MESSAGE': 'KIT_NOT_EXIST'}, status=400)
+
+            kit_info = {
+                'kitId'        : kit.id,
+                'kitName'      : kit.name,
+                'mainImageUrl' : kit.main_image_url,
+                'description'  : kit.description,
+                'price'        : int(kit.price),
+                'subImageUrls' : [{
+                                    'subImageUrl' : sub_image.image_url
+                                 } for sub_image in kit.kitsubimageurl_set.all()]
+            }
+            cache.set(cache_key, kit_info, KIT_CACHE_TIMEOUT)
+
+        return JsonResponse({'KIT': kit_info}, status=200)
@@ -0,0 +1,34 @@
+# Generated by Django 3.1.3 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+ORDER_SEQUENCE_ID = 1
+
+
+def seed_order_sequence(apps, schema_editor):
+    Order         = apps.get_model('order', 'Order')
+    OrderSequence = apps.get_model('order', 'OrderSequence')
+
+    # 기존 주문번호는 Order 개수로 매겼으므로 그 다음 번호부터 이어서 발급한다
+    OrderSequence.objects.create(id=ORDER_SEQUENCE_ID, last_number=Order.objects.count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0002_auto_20210113_1152'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSequence',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_number', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'order_sequences',
+            },
+        ),
+        migrations.RunPython(seed_order_sequence, migrations.RunPython.noop),
+    ]
@@ -29,3 +29,9 @@ class OrderStatus(models.Model):
 
     class Meta:
         db_table = 'order_statuses'
+
+class OrderSequence(models.Model):
+    last_number = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'order_sequences'
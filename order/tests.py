@@ -3,10 +3,11 @@ from datetime       import date, timedelta
 from django.test    import Client, TransactionTestCase
 from django.urls    import reverse
 from django.db      import connection
+from django.test.utils import CaptureQueriesContext
 
 from product.models import Product, MainCategory, SubCategory, Difficulty
-from user.models    import User, Coupon
-from order.models   import Order, OrderStatus, PaymentMethod
+from user.models    import User, Coupon, UserProduct, Organization
+from order.models   import Order, OrderStatus, PaymentMethod, OrderSequence
 from core.utils     import issue_token
 
 class TestSelectProductAndPaymentView(TransactionTestCase):
@@ -432,6 +433,62 @@ class TestSelectProductAndPaymentView(TransactionTestCase):
             str(date.today() + timedelta(days=7))
         )
 
+    def test_select_product_and_payment_exclude_unusable_coupons(self):
+        url = reverse('apply_product', args=[1])
+
+        other_product = Product.objects.create(
+            name            = 'other',
+            price           = 1000.00,
+            sale            = 0.0,
+            start_date      = date.today(),
+            thumbnail_image = 'test_thumbnail_image_url'
+        )
+
+        self.user.coupon.add(Coupon.objects.create(
+            name          = '만료 쿠폰',
+            discount_cost = 1000.00,
+            expire_date   = date.today() - timedelta(days=1)
+        ))
+        self.user.coupon.add(Coupon.objects.create(
+            name          = '다른 강의 쿠폰',
+            discount_cost = 1000.00,
+            product       = other_product
+        ))
+
+        response = self.client.get(
+            url,
+            content_type='application/json',
+            **self.header
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [coupon['couponName'] for coupon in response.json()['ORDER_INFO']['couponInfo']],
+            ['회원가입 축하 쿠폰', '기간 한정 할인 쿠폰']
+        )
+        self.assertEqual(
+            response.json()['ORDER_INFO']['couponInfo'][0]['couponAppliedPrice'],
+            '90,000원'
+        )
+
+    def test_select_product_and_payment_coupon_query_count_is_constant(self):
+        url = reverse('apply_product', args=[1])
+
+        for i in range(5):
+            self.user.coupon.add(Coupon.objects.create(
+                name          = 'coupon' + str(i),
+                discount_cost = 1000.00
+            ))
+
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                url,
+                content_type='application/json',
+                **self.header
+            )
+
+        self.assertEqual(response.status_code, 200)
+
 class TestOrderProductView(TransactionTestCase):
 
     def setUp(self):
@@ -688,3 +745,326 @@ class TestOrderProductView(TransactionTestCase):
             response.json()['MESSAGE'],
             'ORDER_SUCCESS'
         )
+
+
+    def test_request_order_fail_for_price_mismatch(self):
+        url = reverse('payment_product', args=[1])
+
+        post_request_for_order = {
+            'user_name'        : '안혜수',
+            'phone_number'     : '01011112222',
+            'post_number'      : '123-123',
+            'address'          : '서울시 강남구',
+            'sub_address'      : '테헤란로 427 위워크 타워(위워크 선릉 2호점)',
+            'request_option'   : '하.. 문 앞에 놓고 연락 주세요..',
+            'coupon_id'        : None,
+            'price'            : 100,
+            'payment_method_id': 1
+        }
+
+        response = self.client.post(
+            url,
+            post_request_for_order,
+            content_type='application/json',
+            **self.header
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()['MESSAGE'],
+            'PRICE_MISMATCH'
+        )
+
+    def test_request_order_fail_for_unavailable_coupon(self):
+        url = reverse('payment_product', args=[1])
+
+        coupons = [
+            Coupon.objects.create(
+                name          = '만료된 쿠폰',
+                discount_cost = 10000.00,
+                expire_date   = date.today() - timedelta(days=1)
+            ),
+            Coupon.objects.create(
+                name          = '다른 카테고리 쿠폰',
+                discount_cost = 10000.00,
+                sub_category  = SubCategory.objects.create(name='요리')
+            )
+        ]
+
+        for coupon in coupons:
+            self.user.coupon.add(coupon)
+
+            response = self.client.post(
+                url,
+                {
+                    'user_name'        : '안혜수',
+                    'phone_number'     : '01011112222',
+                    'post_number'      : '123-123',
+                    'address'          : '서울시 강남구',
+                    'sub_address'      : '테헤란로 427 위워크 타워(위워크 선릉 2호점)',
+                    'request_option'   : '하.. 문 앞에 놓고 연락 주세요..',
+                    'coupon_id'        : coupon.id,
+                    'price'            : 90000,
+                    'payment_method_id': 1
+                },
+                content_type='application/json',
+                **self.header
+            )
+
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['MESSAGE'], 'COUPON_NOT_EXIST')
+
+        self.assertEqual(self.user.coupon.count(), 2)
+        self.assertEqual(Order.objects.count(), 0)
+
+class TestBatchOrderView(TransactionTestCase):
+
+    def setUp(self):
+        self.client = Client()
+
+        main_categories = MainCategory.objects.create(
+            id   = 1,
+            name = '크리에이티브'
+        )
+
+        sub_categories = SubCategory.objects.create(
+            id   = 11,
+            name = '데이터/개발'
+        )
+
+        difficulty = Difficulty.objects.create(
+            name = '초급자'
+        )
+
+        self.product = Product.objects.create(
+            name            = 'test',
+            effective_time  = timedelta(days=30),
+            price           = 100000.00,
+            sale            = 0.0,
+            start_date      = date.today(),
+            thumbnail_image = 'test_thumbnail_image_url',
+            main_category   = main_categories,
+            sub_category    = sub_categories,
+            difficulty      = difficulty
+        )
+
+        OrderStatus.objects.create(
+            id     = 7,
+            status = '수강신청'
+        )
+
+        PaymentMethod.objects.create(
+            name = '무통장 입금'
+        )
+
+        self.coupon = Coupon.objects.create(
+            name          = '단체 구매 쿠폰',
+            discount_cost = 10000.00,
+            expire_date   = None
+        )
+
+        self.organization = Organization.objects.create(name='위코드')
+
+        self.buyer = User.objects.create(
+            name                  = '안혜수',
+            phone_number          = '01011111234',
+            organization          = self.organization,
+            is_organization_admin = True
+        )
+
+        self.seats = [
+            User.objects.create(name='seat' + str(i), point=0, organization=self.organization)
+            for i in range(3)
+        ]
+
+        # 마이그레이션이 만드는 주문번호 시퀀스 행
+        OrderSequence.objects.update_or_create(id=1, defaults={'last_number': 0})
+
+        self.seats[0].coupon.add(self.coupon)
+
+        self.header = {
+            'HTTP_Authorization': issue_token(self.buyer.id),
+        }
+
+        self.request = {
+            'user_name'        : '안혜수',
+            'phone_number'     : '01011112222',
+            'post_number'      : '123-123',
+            'address'          : '서울시 강남구',
+            'sub_address'      : '테헤란로 427',
+            'request_option'   : None,
+            'payment_method_id': 1,
+            'orders'           : []
+        }
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute('set foreign_key_checks=0')
+            cursor.execute('truncate main_categories')
+            cursor.execute('truncate sub_categories')
+            cursor.execute('truncate difficulties')
+            cursor.execute('truncate coupons')
+            cursor.execute('truncate users')
+            cursor.execute('truncate users_coupons')
+            cursor.execute('truncate products')
+            cursor.execute('truncate users_products')
+            cursor.execute('truncate orders')
+            cursor.execute('truncate order_statuses')
+            cursor.execute('truncate payment_methods')
+            cursor.execute('truncate organizations')
+            cursor.execute('truncate order_sequences')
+            cursor.execute('set foreign_key_checks=1')
+
+    def test_batch_order_success(self):
+        url = reverse('batch_order')
+
+        self.request['orders'] = [
+            {'user_id': seat.id, 'product_id': self.product.id} for seat in self.seats
+        ]
+        self.request['orders'][0]['coupon_id'] = self.coupon.id
+
+        response = self.client.post(
+            url,
+            self.request,
+            content_type='application/json',
+            **self.header
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Order.objects.count(), 3)
+        self.assertEqual(UserProduct.objects.count(), 3)
+        self.assertFalse(self.seats[0].coupon.exists())
+        self.assertEqual(User.objects.get(id=self.seats[0].id).point, 2700)
+        self.assertEqual(User.objects.get(id=self.seats[1].id).point, 3000)
+
+    def test_batch_order_report_per_item_failure(self):
+        url = reverse('batch_order')
+
+        self.seats[1].user_product.add(self.product)
+
+        self.request['orders'] = [
+            {'user_id': self.seats[0].id, 'product_id': self.product.id},
+            {'user_id': self.seats[0].id, 'product_id': self.product.id},
+            {'user_id': self.seats[1].id, 'product_id': self.product.id},
+            {'user_id': self.seats[2].id, 'product_id': 100},
+            {'user_id': self.seats[2].id, 'product_id': self.product.id, 'coupon_id': self.coupon.id},
+        ]
+
+        response = self.client.post(
+            url,
+            self.request,
+            content_type='application/json',
+            **self.header
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result['MESSAGE'] for result in response.json()['RESULT']],
+            [
+                'ORDER_SUCCESS',
+                'DUPLICATE_ORDER',
+                'ALREADY_OWNED_PRODUCT',
+                'PRODUCT_NOT_EXIST',
+                'COUPON_NOT_EXIST'
+            ]
+        )
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_batch_order_query_count_is_constant(self):
+        url = reverse('batch_order')
+
+        query_counts = []
+        for seats in [self.seats[:1], self.seats[1:]]:
+            self.request['orders'] = [
+                {'user_id': seat.id, 'product_id': self.product.id} for seat in seats
+            ]
+
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(
+                    url,
+                    self.request,
+                    content_type='application/json',
+                    **self.header
+                )
+
+            self.assertEqual(response.status_code, 200)
+            query_counts.append(len(context.captured_queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_batch_order_fail_not_organization_admin(self):
+        url = reverse('batch_order')
+
+        self.request['orders'] = [
+            {'user_id': seat.id, 'product_id': self.product.id} for seat in self.seats
+        ]
+
+        response = self.client.post(
+            url,
+            self.request,
+            content_type='application/json',
+            HTTP_Authorization=issue_token(self.seats[0].id)
+        )
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['MESSAGE'], 'PERMISSION_DENIED')
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_batch_order_reject_outsider_and_inapplicable_coupon(self):
+        url = reverse('batch_order')
+
+        outsider = User.objects.create(name='outsider', organization=Organization.objects.create(name='다른 회사'))
+        product_coupon = Coupon.objects.create(
+            name          = '다른 강의 전용 쿠폰',
+            discount_cost = 10000.00,
+            product       = Product.objects.create(
+                name            = 'other',
+                price           = 50000.00,
+                sale            = 0.0,
+                start_date      = date.today(),
+                thumbnail_image = 'test_thumbnail_image_url',
+                sub_category    = self.product.sub_category,
+                difficulty      = self.product.difficulty
+            )
+        )
+        self.seats[1].coupon.add(product_coupon)
+
+        self.request['orders'] = [
+            {'user_id': outsider.id, 'product_id': self.product.id},
+            {'user_id': self.seats[1].id, 'product_id': self.product.id, 'coupon_id': product_coupon.id},
+        ]
+
+        response = self.client.post(
+            url,
+            self.request,
+            content_type='application/json',
+            **self.header
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [result['MESSAGE'] for result in response.json()['RESULT']],
+            ['USER_NOT_IN_ORGANIZATION', 'COUPON_NOT_APPLICABLE']
+        )
+        self.assertTrue(self.seats[1].coupon.exists())
+
+    def test_batch_order_numbers_come_from_sequence(self):
+        url = reverse('batch_order')
+
+        for seats in [self.seats[:2], self.seats[2:]]:
+            self.request['orders'] = [
+                {'user_id': seat.id, 'product_id': self.product.id} for seat in seats
+            ]
+
+            self.client.post(
+                url,
+                self.request,
+                content_type='application/json',
+                **self.header
+            )
+
+        self.assertEqual(
+            sorted(int(order.order_number[-10:]) for order in Order.objects.all()),
+            [1, 2, 3]
+        )
+        self.assertEqual(OrderSequence.objects.get(id=1).last_number, 3)
@@ -4,12 +4,24 @@ from datetime       import datetime, date
 from django.views   import View
 from django.http    import JsonResponse
 from django.db      import IntegrityError, transaction
-
-from product.models import Product
+from django.db.models import F, Q
+
+from product.models import Product, ProductKit
+from product.pricing import (
+    get_discount_price,
+    get_coupon_applied_price,
+    get_order_price,
+    get_point
+)
 from user.models    import User, UserCoupon, UserProduct
-from order.models   import Order, OrderStatus, PaymentMethod
+from order.models   import Order, OrderStatus, PaymentMethod, OrderSequence
+from product.versions import bump_user_versions
 from core.utils     import login_decorator
 
+MAX_BATCH_ORDER_SIZE = 500
+
+ORDER_SEQUENCE_ID = 1
+
 class SelectProductAndPaymentView(View):
 
     @login_decorator(login_required=True)
@@ -17,7 +29,8 @@ class SelectProductAndPaymentView(View):
         try:
             user            = request.user
             product         = Product.objects.get(id=product_id)
-            user_coupons    = user.usercoupon_set.all()
+            discounted      = int(product.final_price)
+            user_coupons    = get_available_user_coupons(user.id, product).order_by('id')
             
             order_info = {
                 'className'      : product.name,
@@ -26,15 +39,18 @@ class SelectProductAndPaymentView(View):
                 'userPhoneNumber': user.phone_number,
                 'userId'         : user.id,
                 'originalPrice'  : '{:,}원'.format(int(product.price)),
-                'discountPrice'  : '{:,}원'.format(int(product.price * product.sale) * -1),
-                'discountedPrice': '{:,}원'.format(int((1 - product.sale) * product.price)),
+                'discountPrice'  : '{:,}원'.format(get_discount_price(product.price, product.sale) * -1),
+                'discountedPrice': '{:,}원'.format(discounted),
                 'couponInfo'     : [
                     {
-                        'userCouponId'     : user_coupon.id,
-                        'couponName'       : user_coupon.coupon.name,
-                        'couponDiscount'   : '{:,}원'.format(int(user_coupon.coupon.discount_cost)),
-                        'couponExpiredDate': '무제한' if not user_coupon.coupon.expire_date else
-                                             user_coupon.coupon.expire_date
+                        'userCouponId'       : user_coupon.id,
+                        'couponName'         : user_coupon.coupon.name,
+                        'couponDiscount'     : '{:,}원'.format(int(user_coupon.coupon.discount_cost)),
+                        'couponExpiredDate'  : '무제한' if not user_coupon.coupon.expire_date else
+                                               user_coupon.coupon.expire_date,
+                        'couponAppliedPrice' : '{:,}원'.format(
+                                                   get_coupon_applied_price(discounted, user_coupon.coupon)
+                                               )
                     } for user_coupon in user_coupons
                 ]
             }
@@ -70,22 +86,42 @@ class OrderProductView(View):
             ):
                 raise RequiredInputException
 
-            if Product.objects.get(id=product_id).kit.exists():
+            product = Product.objects.get(id=product_id)
+
+            if product.kit.exists():
 
                 if is_all_blank(post_number, address, sub_address):
                     raise RequiredInputException
 
             user = request.user
 
+            coupon = None
+            if coupon_id:
+                # 결제 화면(SelectProductAndPaymentView)에 보여 준 쿠폰만 쓸 수 있다
+                user_coupon = get_available_user_coupons(user.id, product).filter(
+                    coupon_id = coupon_id
+                ).first()
+
+                if not user_coupon:
+                    raise CouponNotExistException
+
+                coupon = user_coupon.coupon
+
+            # 결제 금액은 클라이언트 값을 믿지 않고 서버에서 다시 계산
+            order_price = get_order_price(product, coupon)
+
+            if int(price) != order_price:
+                raise PriceMismatchException
+
             if not UserProduct.objects.filter(
                 user_id    = user.id,
                 product_id = product_id
             ).exists():
 
-                user.user_product.add(Product.objects.get(id=product_id))
+                user.user_product.add(product)
 
             else:
-                product_effective_time = Product.objects.get(id=product_id).effective_time
+                product_effective_time = product.effective_time
 
                 if not product_effective_time:
                     raise PermanentProductException
@@ -103,6 +139,7 @@ class OrderProductView(View):
                     user_id    = user.id,
                     product_id = product_id
                 ).update(created_at=datetime.today())
+                bump_user_versions([user.id])
 
             try:
                 with transaction.atomic():
@@ -112,13 +149,13 @@ class OrderProductView(View):
                         address        = f'{address} {sub_address} {post_number}',
                         order_number   = generate_order_number(
                                             datetime.now(),
-                                            Order.objects.count() + 1
+                                            reserve_order_numbers(1)[0]
                                         ),
                         request_option = request_option,
                         order_status   = OrderStatus.objects.get(id=7),
                         product_id     = product_id,
                         kit            = None,
-                        coupon         = coupon_id,
+                        coupon         = coupon,
                         payment_method = PaymentMethod.objects.get(id=payment_method_id),
                         user_id        = user.id
                     )
@@ -129,7 +166,7 @@ class OrderProductView(View):
                             coupon_id = coupon_id
                         ).delete()
 
-                    user.point += int(price * 0.03)
+                    user.point += get_point(order_price)
                     user.save()
 
             except IntegrityError:
@@ -152,9 +189,254 @@ class OrderProductView(View):
         except AlreadyOwnedProductException as e:
             return JsonResponse({'MESSAGE': e.__str__()}, status=400)
 
+        except CouponNotExistException as e:
+            return JsonResponse({'MESSAGE': e.__str__()}, status=400)
+
+        except PriceMismatchException as e:
+            return JsonResponse({'MESSAGE': e.__str__()}, status=400)
+
+class BatchOrderView(View):
+
+    @login_decorator(login_required=True)
+    def post(self, request):
+        # 단체 구매는 기관 관리자만, 같은 기관에 속한 유저의 좌석만 결제할 수 있다
+        if not request.user.is_organization_admin or not request.user.organization_id:
+            return JsonResponse({'MESSAGE': 'PERMISSION_DENIED'}, status=403)
+
+        try:
+            payload = json.loads(request.body)
+
+            user_name         = payload['user_name']
+            phone_number      = payload['phone_number']
+            post_number       = payload['post_number']
+            address           = payload['address']
+            sub_address       = payload['sub_address']
+            request_option    = payload['request_option']
+            payment_method_id = payload['payment_method_id']
+            items             = payload['orders']
+
+            if is_all_blank(user_name, phone_number, payment_method_id, items):
+                raise RequiredInputException
+
+            if len(items) > MAX_BATCH_ORDER_SIZE:
+                return JsonResponse({'MESSAGE': 'TOO_MANY_ORDERS'}, status=400)
+
+            items = [
+                (
+                    int(item['user_id']),
+                    int(item['product_id']),
+                    int(item['coupon_id']) if item.get('coupon_id') else None
+                ) for item in items
+            ]
+
+            user_ids    = {user_id for user_id, _, _ in items}
+            product_ids = {product_id for _, product_id, _ in items}
+            coupon_ids  = {coupon_id for _, _, coupon_id in items if coupon_id}
+
+            users    = User.objects.in_bulk(user_ids)
+            products = Product.objects.in_bulk(product_ids)
+
+            kit_product_ids = set(
+                ProductKit.objects.filter(product_id__in=product_ids).
+                values_list('product_id', flat=True)
+            )
+
+            if kit_product_ids and is_all_blank(post_number, address, sub_address):
+                raise RequiredInputException
+
+            user_products = {
+                (user_product.user_id, user_product.product_id): user_product
+                for user_product in UserProduct.objects.filter(
+                    user_id__in    = user_ids,
+                    product_id__in = product_ids
+                )
+            }
+
+            user_coupons = {}
+            for user_coupon in UserCoupon.objects.select_related('coupon').filter(
+                user_id__in   = user_ids,
+                coupon_id__in = coupon_ids
+            ):
+                user_coupons.setdefault(
+                    (user_coupon.user_id, user_coupon.coupon_id), []
+                ).append(user_coupon)
+
+            order_status   = OrderStatus.objects.get(id=7)
+            payment_method = PaymentMethod.objects.get(id=payment_method_id)
+
+        except json.JSONDecodeError:
+            return JsonResponse({'MESSAGE': 'JSON_DECODE_ERROR'}, status=400)
+
+        except KeyError:
+            return JsonResponse({'MESSAGE': 'KEY_ERROR'}, status=400)
+
+        except (TypeError, ValueError):
+            return JsonResponse({'MESSAGE': 'VALUE_ERROR'}, status=400)
+
+        except RequiredInputException as e:
+            return JsonResponse({'MESSAGE': e.__str__()}, status=400)
+
+        except OrderStatus.DoesNotExist:
+            return JsonResponse({'MESSAGE': 'ORDER_STATUS_NOT_EXIST'}, status=400)
+
+        except PaymentMethod.DoesNotExist:
+            return JsonResponse({'MESSAGE': 'PAYMENT_METHOD_NOT_EXIST'}, status=400)
+
+        now             = datetime.today()
+        results         = []
+        ordered_pairs   = set()
+        new_orders      = []
+        new_ownerships  = []
+        renewed         = []
+        used_coupon_ids = []
+        earned_points   = {}
+
+        for index, (user_id, product_id, coupon_id) in enumerate(items):
+            product          = products.get(product_id)
+            available_coupon = user_coupons.get((user_id, coupon_id))
+            message          = 'ORDER_SUCCESS'
+
+            if user_id not in users:
+                message = 'USER_NOT_EXIST'
+
+            elif users[user_id].organization_id != request.user.organization_id:
+                message = 'USER_NOT_IN_ORGANIZATION'
+
+            elif not product:
+                message = 'PRODUCT_NOT_EXIST'
+
+            elif (user_id, product_id) in ordered_pairs:
+                message = 'DUPLICATE_ORDER'
+
+            elif coupon_id and not available_coupon:
+                message = 'COUPON_NOT_EXIST'
+
+            elif coupon_id and available_coupon[0].coupon.expire_date and \
+                    available_coupon[0].coupon.expire_date < now.date():
+                message = 'EXPIRED_COUPON'
+
+            elif coupon_id and not is_applicable_coupon(available_coupon[0].coupon, product):
+                message = 'COUPON_NOT_APPLICABLE'
+
+            elif (user_id, product_id) in user_products:
+                user_product = user_products[(user_id, product_id)]
+
+                if not product.effective_time:
+                    message = PermanentProductException().__str__()
+
+                elif user_product.created_at + product.effective_time > now:
+                    message = AlreadyOwnedProductException().__str__()
+
+            results.append({
+                'index'    : index,
+                'userId'   : user_id,
+                'productId': product_id,
+                'MESSAGE'  : message
+            })
+
+            if message != 'ORDER_SUCCESS':
+                continue
+
+            ordered_pairs.add((user_id, product_id))
+
+            if (user_id, product_id) in user_products:
+                user_product            = user_products[(user_id, product_id)]
+                user_product.created_at = now
+                renewed.append(user_product)
+            else:
+                new_ownerships.append(
+                    UserProduct(user_id=user_id, product_id=product_id)
+                )
+
+            coupon = None
+
+            if coupon_id:
+                user_coupon = available_coupon.pop(0)
+                coupon      = user_coupon.coupon
+                used_coupon_ids.append(user_coupon.id)
+
+            earned_points[user_id] = \
+                earned_points.get(user_id, 0) + get_point(get_order_price(product, coupon))
+
+            new_orders.append(Order(
+                name           = user_name,
+                phone_number   = phone_number,
+                address        = f'{address} {sub_address} {post_number}',
+                request_option = request_option,
+                order_status   = order_status,
+                product_id     = product_id,
+                kit            = None,
+                coupon_id      = coupon_id,
+                payment_method = payment_method,
+                user_id        = user_id
+            ))
+
+        if not new_orders:
+            return JsonResponse({'MESSAGE': 'NO_VALID_ORDER', 'RESULT': results}, status=400)
+
+        try:
+            with transaction.atomic():
+                order_numbers = reserve_order_numbers(len(new_orders))
+
+                for order, order_number in zip(new_orders, order_numbers):
+                    order.order_number = generate_order_number(now, order_number)
+
+                Order.objects.bulk_create(new_orders)
+                UserProduct.objects.bulk_create(new_ownerships)
+                UserProduct.objects.bulk_update(renewed, ['created_at'])
+                UserCoupon.objects.filter(id__in=used_coupon_ids).delete()
+
+                point_users = []
+                for user_id, point in earned_points.items():
+                    user       = users[user_id]
+                    user.point = F('point') + point
+                    point_users.append(user)
+
+                User.objects.bulk_update(point_users, ['point'])
+
+                # bulk 쓰기는 시그널을 보내지 않으므로 마이페이지 버전을 직접 올린다
+                bump_user_versions({order.user_id for order in new_orders})
+
+        except IntegrityError:
+            return JsonResponse({'MESSAGE': 'TRANSACTION_ERROR'}, status=400)
+
+        return JsonResponse({'MESSAGE': 'ORDER_SUCCESS', 'RESULT': results}, status=200)
+
 def is_all_blank(*args):
     return not all([value for value in args])
 
+def get_available_user_coupons(user_id, product):
+    return UserCoupon.objects.select_related('coupon').filter(
+        Q(coupon__expire_date__isnull=True) |
+        Q(coupon__expire_date__gte=date.today()),
+        Q(coupon__product__isnull=True) |
+        Q(coupon__product_id=product.id),
+        Q(coupon__sub_category__isnull=True) |
+        Q(coupon__sub_category_id=product.sub_category_id),
+        user_id = user_id
+    )
+
+def is_applicable_coupon(coupon, product):
+    return (
+        coupon.product_id in (None, product.id) and
+        coupon.sub_category_id in (None, product.sub_category_id)
+    )
+
+def reserve_order_numbers(count):
+    # UPDATE 가 시퀀스 행을 트랜잭션이 끝날 때까지 잠그므로 동시에 들어온 주문끼리 번호가 겹치지 않는다
+    sequence = OrderSequence.objects.filter(id=ORDER_SEQUENCE_ID)
+
+    if not sequence.update(last_number=F('last_number') + count):
+        OrderSequence.objects.get_or_create(
+            id       = ORDER_SEQUENCE_ID,
+            defaults = {'last_number': Order.objects.count()}
+        )
+        sequence.update(last_number=F('last_number') + count)
+
+    last_number = sequence.values_list('last_number', flat=True).get()
+
+    return range(last_number - count + 1, last_number + 1)
+
 def generate_order_number(date_time, max_order_number):
     return datetime.strftime(date_time, '%Y%m%d%H%M%S%f') + \
            str(max_order_number).zfill(10)
@@ -170,3 +452,11 @@ class PermanentProductException(Exception):
 class AlreadyOwnedProductException(Exception):
     def __init__(self):
         super().__init__('ALREADY_OWNED_PRODUCT')
+
+class CouponNotExistException(Exception):
+    def __init__(self):
+        super().__init__('COUPON_NOT_EXIST')
+
+class PriceMismatchException(Exception):
+    def __init__(self):
+        super().__init__('PRICE_MISMATCH')
@@ -0,0 +1,79 @@
+import threading
+
+from django.db    import transaction
+from django.utils import timezone
+
+from product.models import Product, Chapter, Lecture
+
+_pending = threading.local()
+
+def build_curricula(product_ids):
+    chapters = Chapter.objects.filter(product_id__in=product_ids).order_by('order', 'id')
+    lectures = Lecture.objects.select_related('video').filter(
+        product_id__in=product_ids
+    ).order_by('order', 'id')
+
+    chapter_lectures = {}
+    for lecture in lectures:
+        chapter_lectures.setdefault(lecture.chapter_id, []).append(lecture)
+
+    curricula = {product_id: [] for product_id in product_ids}
+    for chapter in chapters:
+        curricula[chapter.product_id].append({
+            'thumbnailImage' : chapter.thumbnail_image,
+            'chapterName'    : chapter.name,
+            'order'          : chapter.order,
+            'chapterDetail'  : [{
+                                    'lectureNum'      : index,
+                                    'lectureTitle'    : lecture.name,
+                                    'lectureVideoUrl' : lecture.video.video_url if lecture.video else None,
+                                } for index, lecture in
+                                  enumerate(chapter_lectures.get(chapter.id, []), start=1)]
+        })
+
+    return curricula
+
+def build_curriculum(product_id):
+    return build_curricula([product_id])[product_id]
+
+def refresh_curriculum(product_id):
+    curriculum = build_curriculum(product_id)
+    Product.objects.filter(id=product_id).update(curriculum=curriculum, updated_at=timezone.now())
+    return curriculum
+
+def refresh_curricula(products):
+    # 커리큘럼이 비어 있는 상품 여러 개를 챕터/강의 쿼리 두 번과 UPDATE 한 번으로 채운다
+    curricula = build_curricula([product.id for product in products])
+    now       = timezone.now()
+
+    for product in products:
+        product.curriculum = curricula[product.id]
+        product.updated_at = now
+
+    Product.objects.bulk_update(products, ['curriculum', 'updated_at'])
+
+def schedule_curriculum_refresh(product_id):
+    if not product_id:
+        return
+
+    connection = transaction.get_connection()
+
+    if not connection.in_atomic_block:
+        refresh_curriculum(product_id)
+        return
+
+    # 한 트랜잭션 안에서 챕터/강의가 여러 번 바뀌어도 커밋 후 한 번만 다시 만든다
+    pending = getattr(_pending, 'product_ids', None)
+    if pending is None or not connection.run_on_commit:
+        pending = _pending.product_ids = set()
+
+    if product_id in pending:
+        return
+
+    pending.add(product_id)
+
+    def refresh():
+        pending.discard(product_id)
+        refresh_curriculum(product_id)
+
+    transaction.on_commit(refresh)
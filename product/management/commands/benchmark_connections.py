@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db                   import connection
+from django.db.utils             import load_backend
+
+MYSQL_ENGINE = 'clnass_101.backends.mysql'
+POOL_ENGINE  = 'clnass_101.backends.mysql_pool'
+
+class Command(BaseCommand):
+    help = 'Compare per-request latency without reuse, with persistent connections and with the connection pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        settings_dict = connection.settings_dict
+        engine        = MYSQL_ENGINE if settings_dict['ENGINE'] == POOL_ENGINE else settings_dict['ENGINE']
+        conn_max_age  = settings_dict['CONN_MAX_AGE'] or 60
+
+        cases = [
+            ('CONN_MAX_AGE=0', {'ENGINE': engine, 'CONN_MAX_AGE': 0}),
+            (f'CONN_MAX_AGE={conn_max_age}', {'ENGINE': engine, 'CONN_MAX_AGE': conn_max_age})
+        ]
+
+        # 풀 백엔드는 MySQL 전용이라 다른 DB 에서는 건너뛴다
+        if connection.vendor == 'mysql':
+            cases.append(('QueuePool', {
+                'ENGINE'       : POOL_ENGINE,
+                'CONN_MAX_AGE' : 0,
+                'POOL'         : settings_dict.get('POOL', {})
+            }))
+
+        self.stdout.write(f"engine: {settings_dict['ENGINE']}, requests: {options['requests']}")
+
+        for name, overrides in cases:
+            database = load_backend(overrides['ENGINE']).DatabaseWrapper(
+                {**settings_dict, **overrides}, connection.alias
+            )
+
+            try:
+                elapsed = self.run_requests(database, options['requests'])
+            finally:
+                database.close()
+
+            self.stdout.write(f'{name:<20} {elapsed / options["requests"] * 1000:8.3f} ms/request')
+
+    def run_requests(self, database, count):
+        # 요청 시작/종료 때 Django 가 하는 연결 정리(close_old_connections)를 그대로 흉내낸다
+        started = time.perf_counter()
+
+        for _ in range(count):
+            database.close_if_unusable_or_obsolete()
+
+            with database.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+
+            database.close_if_unusable_or_obsolete()
+
+        return time.perf_counter() - started
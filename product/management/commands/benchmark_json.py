@@ -0,0 +1,49 @@
+import time
+from datetime import datetime, timezone
+from decimal  import Decimal
+
+from django.core.management.base import BaseCommand
+from django.http                 import JsonResponse
+
+from core.responses import FastJsonResponse, StreamingJsonResponse, orjson
+
+class Command(BaseCommand):
+    help = 'Compare JsonResponse and FastJsonResponse on a main page sized product listing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=5000)
+        parser.add_argument('--rounds', type=int, default=20)
+
+    def handle(self, *args, **options):
+        created_at = datetime(2026, 10, 19, tzinfo=timezone.utc)
+        products   = [{
+            'created_at'  : created_at,
+            'id'          : index,
+            'title'       : f'클래스 {index}',
+            'thumbnail'   : f'https://example.com/thumbnail/{index}.jpg',
+            'subCategory' : '드로잉',
+            'creator'     : f'creator{index}',
+            'isLiked'     : False,
+            'likeCount'   : index % 100,
+            'price'       : 150000,
+            'sale'        : Decimal('0.10'),
+            'finalPrice'  : 135000
+        } for index in range(options['products'])]
+
+        responses = {
+            'JsonResponse'          : lambda: JsonResponse({'RESULT': products}).content,
+            'FastJsonResponse'      : lambda: FastJsonResponse({'RESULT': products}).content,
+            'StreamingJsonResponse' : lambda: b''.join(StreamingJsonResponse(products, 'RESULT'))
+        }
+
+        self.stdout.write(f"encoder: {'orjson' if orjson else 'json'}, products: {options['products']}")
+
+        for name, render in responses.items():
+            started = time.perf_counter()
+
+            for _ in range(options['rounds']):
+                size = len(render())
+
+            elapsed = (time.perf_counter() - started) / options['rounds'] * 1000
+
+            self.stdout.write(f'{name:<22} {elapsed:8.2f} ms {size:>10} bytes')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from product.progress import flush_progress
+
+class Command(BaseCommand):
+    help = 'Write buffered lecture progress heartbeats from the cache to the database'
+
+    def handle(self, *args, **options):
+        flush_progress()
+
+        self.stdout.write(self.style.SUCCESS('lecture progress flushed'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db                   import transaction
+from django.db.models            import OuterRef
+
+from product.models import Community, CommunityComment, CommunityLike
+from core.utils     import count_subquery
+
+class Command(BaseCommand):
+    help = 'Recount comment_count and like_count of every community'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = Community.objects.update(
+                comment_count = count_subquery(
+                    CommunityComment.objects.filter(community_id=OuterRef('id')), 'community_id'
+                ),
+                like_count    = count_subquery(
+                    CommunityLike.objects.filter(community_id=OuterRef('id')), 'community_id'
+                )
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'{updated} communities reconciled'))
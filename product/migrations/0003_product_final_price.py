@@ -0,0 +1,31 @@
+# Generated by Django 3.1.3 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+from product.pricing import get_sale_price
+
+
+def fill_final_price(apps, schema_editor):
+    Product = apps.get_model('product', 'Product')
+
+    products = list(Product.objects.only('id', 'price', 'sale'))
+    for product in products:
+        product.final_price = get_sale_price(product.price, product.sale)
+
+    Product.objects.bulk_update(products, ['final_price'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0002_auto_20210113_1152'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='final_price',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.RunPython(fill_final_price, migrations.RunPython.noop),
+    ]
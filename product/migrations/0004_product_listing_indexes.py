@@ -0,0 +1,33 @@
+# Generated by Django 3.1.3 on 2026-10-19 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0003_product_final_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['sub_category', 'is_deleted', 'created_at'], name='products_sub_del_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['main_category', 'is_deleted', 'created_at'], name='products_main_del_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['sub_category', 'is_deleted', 'final_price'], name='products_sub_del_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_deleted', 'final_price'], name='products_del_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_deleted', 'difficulty', 'created_at'], name='products_del_diff_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.3 on 2026-10-19 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0004_product_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='curriculum',
+            field=models.JSONField(null=True),
+        ),
+    ]
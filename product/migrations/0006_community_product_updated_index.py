@@ -0,0 +1,17 @@
+# Generated by Django 3.1.3 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0005_product_curriculum'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='community',
+            index=models.Index(fields=['product', '-updated_at', '-id'], name='communities_product_upd_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.1.3 on 2026-10-19 12:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(community_id=OuterRef('id')).order_by().
+            values('community_id').annotate(count=Count('id')).values('count')[:1]
+        ),
+        0
+    )
+
+
+def fill_community_counts(apps, schema_editor):
+    Community        = apps.get_model('product', 'Community')
+    CommunityComment = apps.get_model('product', 'CommunityComment')
+    CommunityLike    = apps.get_model('product', 'CommunityLike')
+
+    Community.objects.update(
+        comment_count = count_subquery(CommunityComment),
+        like_count    = count_subquery(CommunityLike)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0006_community_product_updated_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='community',
+            name='comment_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='community',
+            name='like_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_community_counts, migrations.RunPython.noop),
+    ]
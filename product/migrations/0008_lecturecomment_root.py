@@ -0,0 +1,41 @@
+# Generated by Django 3.1.3 on 2026-10-19 13:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_comment_roots(apps, schema_editor):
+    LectureComment = apps.get_model('product', 'LectureComment')
+
+    parents = dict(LectureComment.objects.values_list('id', 'parent_id'))
+    roots   = {}
+
+    for comment_id in parents:
+        root_id = comment_id
+        while parents.get(root_id):
+            root_id = parents[root_id]
+        if root_id != comment_id:
+            roots.setdefault(root_id, []).append(comment_id)
+
+    for root_id, comment_ids in roots.items():
+        LectureComment.objects.filter(id__in=comment_ids).update(root_id=root_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0007_community_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lecturecomment',
+            name='root',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='thread_comments', to='product.lecturecomment'),
+        ),
+        migrations.RunPython(fill_comment_roots, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='lecturecomment',
+            index=models.Index(fields=['lecture', 'root', '-created_at', '-id'], name='lecture_comments_root_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.1.3 on 2026-10-19 13:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_recentlyview_bounded_history'),
+        ('product', '0008_lecturecomment_root'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lectureprogress',
+            name='watched_seconds',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lectureprogress',
+            name='is_completed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterUniqueTogether(
+            name='lectureprogress',
+            unique_together={('user', 'lecture')},
+        ),
+        migrations.CreateModel(
+            name='ProductProgress',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_lecture_count', models.IntegerField(default=0)),
+                ('percent', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='product.product')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='user.user')),
+            ],
+            options={
+                'db_table': 'product_progresses',
+                'unique_together': {('user', 'product')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.1.3 on 2026-10-19 14:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0009_lecture_progress_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lecture',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='lecturecontent',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='lecturecontent',
+            index=models.Index(fields=['lecture', 'order'], name='lecture_contents_order_idx'),
+        ),
+    ]
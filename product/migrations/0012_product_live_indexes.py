@@ -0,0 +1,21 @@
+# Generated by Django 3.1.3 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0011_product_updated_at_datetime'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_deleted', 'created_at'], name='products_del_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['creator', 'is_deleted', 'created_at'], name='products_creator_del_idx'),
+        ),
+    ]
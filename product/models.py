@@ -1,10 +1,21 @@
-from django.db import models
+from collections import Counter
+
+from django.db        import models, router, transaction
+from django.db.models import F
+
+from product.pricing import get_sale_price
+
+class ProductManager(models.Manager):
+    # 삭제(is_deleted) 된 상품은 기본 조회에서 빠진다. 필요하면 Product.all_objects 를 쓴다
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
 
 class Product(models.Model):
     name            = models.CharField(max_length=100)
     effective_time  = models.DurationField(null=True)
     price           = models.DecimalField(max_digits=10, decimal_places=2)
     sale            = models.DecimalField(max_digits=3, decimal_places=2)
+    final_price     = models.DecimalField(max_digits=10, decimal_places=2, default=0, db_index=True)
     start_date      = models.DateField()
     thumbnail_image = models.URLField(max_length=1000)
     main_category   = models.ForeignKey('product.MainCategory', on_delete=models.SET_NULL, null=True)
@@ -15,11 +26,32 @@ class Product(models.Model):
     kit             = models.ManyToManyField('kit.Kit', through='ProductKit')
     detail_category = models.ManyToManyField('product.DetailCategory', through='ProductDetailCategory')
     created_at      = models.DateTimeField(auto_now_add=True)
-    updated_at      = models.DateField(auto_now=True, editable=True)
+    updated_at      = models.DateTimeField(auto_now=True, editable=True)
     is_deleted      = models.BooleanField(default=False)
+    curriculum      = models.JSONField(null=True)
+
+    objects     = ProductManager()
+    all_objects = models.Manager()
     
     class Meta:
         db_table = 'products'
+        indexes  = [
+            models.Index(fields=['sub_category', 'is_deleted', 'created_at'], name='products_sub_del_created_idx'),
+            models.Index(fields=['main_category', 'is_deleted', 'created_at'], name='products_main_del_created_idx'),
+            models.Index(fields=['sub_category', 'is_deleted', 'final_price'], name='products_sub_del_price_idx'),
+            models.Index(fields=['is_deleted', 'final_price'], name='products_del_price_idx'),
+            models.Index(fields=['is_deleted', 'difficulty', 'created_at'], name='products_del_diff_created_idx'),
+            models.Index(fields=['is_deleted', 'created_at'], name='products_del_created_idx'),
+            models.Index(fields=['creator', 'is_deleted', 'created_at'], name='products_creator_del_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.final_price = get_sale_price(self.price, self.sale)
+
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'final_price'}
+
+        super().save(*args, **kwargs)
 
 class ProductSubImage(models.Model):
     image_url = models.URLField(max_length=1000)
@@ -49,28 +81,66 @@ class ProductContent(models.Model):
         db_table = 'product_contents'
 
 class Community(models.Model):
-    description = models.CharField(max_length=1000)
-    user        = models.ForeignKey('user.User', on_delete=models.CASCADE)
-    product     = models.ForeignKey('product.Product', on_delete=models.CASCADE)
-    created_at  = models.DateTimeField(auto_now_add=True)
-    updated_at  = models.DateTimeField(auto_now=True, editable=True)
+    description   = models.CharField(max_length=1000)
+    user          = models.ForeignKey('user.User', on_delete=models.CASCADE)
+    product       = models.ForeignKey('product.Product', on_delete=models.CASCADE)
+    comment_count = models.IntegerField(default=0)
+    like_count    = models.IntegerField(default=0)
+    created_at    = models.DateTimeField(auto_now_add=True)
+    updated_at    = models.DateTimeField(auto_now=True, editable=True)
     
     class Meta:
         db_table = 'communities'
+        indexes  = [
+            models.Index(fields=['product', '-updated_at', '-id'], name='communities_product_upd_idx'),
+        ]
+
+def change_community_count(community_id, field, amount, using=None):
+    Community.objects.using(using).filter(id=community_id).update(**{field: F(field) + amount})
+
+class CommunityCountQuerySet(models.QuerySet):
+    # bulk_create 는 post_save 를 보내지 않으므로 같은 트랜잭션 안에서 카운터를 직접 올린다
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+
+            for community_id, amount in Counter(obj.community_id for obj in objs).items():
+                change_community_count(community_id, self.model.count_field, amount, using=self.db)
+
+        return objs
+
+class CommunityCountedModel(models.Model):
+    count_field = None
+
+    objects = CommunityCountQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        # post_save 에서 올리는 카운터가 행 저장과 같은 트랜잭션에 들어가도록 묶는다
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
 
-class CommunityComment(models.Model):
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+class CommunityComment(CommunityCountedModel):
     content    = models.CharField(max_length=500)
     user       = models.ForeignKey('user.User', on_delete=models.CASCADE)
     community  = models.ForeignKey('product.Community', on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True, editable=True)
+
+    count_field = 'comment_count'
     
     class Meta:
         db_table = 'community_comments'
 
-class CommunityLike(models.Model):
+class CommunityLike(CommunityCountedModel):
     user      = models.ForeignKey('user.User', on_delete=models.CASCADE)
     community = models.ForeignKey('product.Community', on_delete=models.CASCADE)
+
+    count_field = 'like_count'
     
     class Meta:
         db_table = 'community_likes'
@@ -117,11 +187,12 @@ class Chapter(models.Model):
         db_table = 'chapters'
 
 class Lecture(models.Model):
-    name      = models.CharField(max_length=40)
-    product   = models.ForeignKey('product.Product', on_delete=models.CASCADE)
-    video     = models.OneToOneField('product.LectureVideo', on_delete=models.SET_NULL, null=True)
-    chapter   = models.ForeignKey('product.Chapter', on_delete=models.SET_NULL, null=True)
-    order     = models.IntegerField()
+    name       = models.CharField(max_length=40)
+    product    = models.ForeignKey('product.Product', on_delete=models.CASCADE)
+    video      = models.OneToOneField('product.LectureVideo', on_delete=models.SET_NULL, null=True)
+    chapter    = models.ForeignKey('product.Chapter', on_delete=models.SET_NULL, null=True)
+    order      = models.IntegerField()
+    updated_at = models.DateTimeField(auto_now=True, editable=True)
 
     class Meta:
         db_table = 'lectures'
@@ -137,13 +208,25 @@ class LectureComment(models.Model):
     content    = models.CharField(max_length=200)
     image_url  = models.URLField(max_length=1000, null=True)
     user       = models.ForeignKey('user.User', on_delete=models.CASCADE)
+    # 중간 댓글이 지워지면 그 답글은 parent 만 비워져 같은 스레드(root) 아래에 남는다.
+    # 스레드의 첫 댓글(root)이 지워지면 스레드 전체가 함께 지워진다
     parent     = models.ForeignKey('self', on_delete=models.SET_NULL, null=True)
+    root       = models.ForeignKey('self', on_delete=models.CASCADE, null=True, related_name='thread_comments')
     lecture    = models.ForeignKey('product.Lecture', on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True, editable=True)
 
     class Meta:
         db_table = 'lecture_comments'
+        indexes  = [
+            models.Index(fields=['lecture', 'root', '-created_at', '-id'], name='lecture_comments_root_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.parent_id and not self.root_id:
+            self.root_id = self.parent.root_id or self.parent_id
+
+        super().save(*args, **kwargs)
 
 class LectureContentDescription(models.Model):
     description = models.CharField(max_length=1000)
@@ -163,19 +246,37 @@ class LectureContent(models.Model):
     lecture     = models.ForeignKey('product.Lecture', on_delete=models.CASCADE)
     product     = models.ForeignKey('product.Product', on_delete=models.CASCADE)
     order       = models.IntegerField()
+    updated_at  = models.DateTimeField(auto_now=True, editable=True)
 
     class Meta:
         db_table = 'lecture_contents'
+        indexes  = [
+            models.Index(fields=['lecture', 'order'], name='lecture_contents_order_idx'),
+        ]
 
 class LectureProgress(models.Model):
-    user       = models.ForeignKey('user.User', on_delete=models.CASCADE)
-    product    = models.ForeignKey('product.Product', on_delete=models.CASCADE)
-    lecture    = models.ForeignKey('product.Lecture', on_delete=models.CASCADE)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True, editable=True)
+    user            = models.ForeignKey('user.User', on_delete=models.CASCADE)
+    product         = models.ForeignKey('product.Product', on_delete=models.CASCADE)
+    lecture         = models.ForeignKey('product.Lecture', on_delete=models.CASCADE)
+    watched_seconds = models.IntegerField(default=0)
+    is_completed    = models.BooleanField(default=False)
+    created_at      = models.DateTimeField(auto_now_add=True)
+    updated_at      = models.DateTimeField(auto_now=True, editable=True)
+
+    class Meta:
+        db_table        = 'lecture_progresses'
+        unique_together = ('user', 'lecture')
+
+class ProductProgress(models.Model):
+    user                    = models.ForeignKey('user.User', on_delete=models.CASCADE)
+    product                 = models.ForeignKey('product.Product', on_delete=models.CASCADE)
+    completed_lecture_count = models.IntegerField(default=0)
+    percent                 = models.IntegerField(default=0)
+    updated_at              = models.DateTimeField(auto_now=True, editable=True)
 
     class Meta:
-        db_table = 'lecture_progresses'
+        db_table        = 'product_progresses'
+        unique_together = ('user', 'product')
 
 class Signature(models.Model):
     name = models.CharField(max_length=40)
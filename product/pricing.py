@@ -0,0 +1,23 @@
+from decimal import Decimal
+
+POINT_RATE = Decimal('0.03')
+
+def to_decimal(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+def get_sale_price(price, sale):
+    return int(to_decimal(price) * (1 - to_decimal(sale)))
+
+def get_discount_price(price, sale):
+    return int(to_decimal(price) * to_decimal(sale))
+
+def get_coupon_applied_price(sale_price, coupon):
+    if not coupon:
+        return sale_price
+    return max(sale_price - int(coupon.discount_cost), 0)
+
+def get_order_price(product, coupon=None):
+    return get_coupon_applied_price(int(product.final_price), coupon)
+
+def get_point(price):
+    return int(to_decimal(price) * POINT_RATE)
@@ -0,0 +1,199 @@
+import time
+
+from django.core.cache          import cache
+from django.db                  import transaction
+from django.db.models           import Case, Count, F, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils               import timezone
+
+from product.models   import Lecture, LectureProgress, ProductProgress
+from product.versions import bump_user_versions
+
+PROGRESS_FLUSH_INTERVAL = 30
+PROGRESS_FLUSH_SIZE     = 500
+PROGRESS_CACHE_TIMEOUT  = PROGRESS_FLUSH_INTERVAL * 10
+LECTURE_PRODUCT_TIMEOUT = 60 * 60
+
+# 하트비트는 워커끼리 공유하는 캐시에 모은다. 운영에서 프로세스마다 따로인 LocMemCache 는 settings 에서 막는다
+# 키마다 타임아웃이 있어서 플러시가 밀려도 버퍼가 무한히 쌓이지 않는다
+#   lecture_progress:{user_id}:{lecture_id}       유저/강의별로 합친 하트비트
+#   lecture_progress:bucket:{bucket}              PROGRESS_FLUSH_INTERVAL 구간에 들어온 키 개수
+#   lecture_progress:bucket:{bucket}:{slot}       그 구간에 들어온 (user_id, lecture_id)
+#   lecture_progress:bucket:{bucket}:claimed      구간을 기록할 워커 하나를 고르는 잠금
+
+def get_bucket():
+    return int(time.time() // PROGRESS_FLUSH_INTERVAL)
+
+def get_heartbeat_key(user_id, lecture_id):
+    return f'lecture_progress:{user_id}:{lecture_id}'
+
+def get_bucket_key(bucket, suffix=None):
+    return f'lecture_progress:bucket:{bucket}' + (f':{suffix}' if suffix is not None else '')
+
+def get_lecture_product_id(lecture_id):
+    cache_key  = f'lecture_product:{lecture_id}'
+    product_id = cache.get(cache_key)
+
+    if product_id is None:
+        product_id = Lecture.objects.filter(id=lecture_id).values_list('product_id', flat=True).first()
+
+        if product_id:
+            cache.set(cache_key, product_id, LECTURE_PRODUCT_TIMEOUT)
+
+    return product_id
+
+def record_heartbeat(user_id, product_id, lecture_id, watched_seconds, is_completed=False):
+    # 하트비트는 캐시에 모았다가 완료 이벤트나 구간이 끝날 때마다 한 번에 기록
+    bucket    = get_bucket()
+    key       = get_heartbeat_key(user_id, lecture_id)
+    previous  = cache.get(key)
+    heartbeat = {
+        'product_id'      : product_id,
+        'watched_seconds' : max(watched_seconds, previous['watched_seconds']) if previous else
+                            watched_seconds,
+        'is_completed'    : is_completed or bool(previous and previous['is_completed']),
+        'bucket'          : bucket
+    }
+
+    cache.set(key, heartbeat, PROGRESS_CACHE_TIMEOUT)
+
+    # 완료 이벤트는 진도율 집계에 바로 반영한다
+    if is_completed and not (previous and previous['is_completed']):
+        write_progress({(user_id, lecture_id): heartbeat})
+        return
+
+    # 구간마다 처음 들어온 하트비트만 목록에 올린다. 같은 키가 여러 구간에 올라가도 기록은 GREATEST 라 안전하다
+    if not previous or previous['bucket'] != bucket:
+        cache.add(get_bucket_key(bucket), 0, PROGRESS_CACHE_TIMEOUT)
+        slot = cache.incr(get_bucket_key(bucket))
+        cache.set(get_bucket_key(bucket, slot), (user_id, lecture_id), PROGRESS_CACHE_TIMEOUT)
+
+    flush_progress(include_current=False)
+
+def flush_progress(include_current=True):
+    # 끝난 구간은 cache.add 로 잠금을 잡은 워커 하나만 기록한다. include_current 면 진행 중인 구간도 바로 기록한다
+    current = get_bucket()
+    buckets = range(current - PROGRESS_CACHE_TIMEOUT // PROGRESS_FLUSH_INTERVAL, current + 1)
+    counts  = cache.get_many([get_bucket_key(bucket) for bucket in buckets])
+
+    for bucket in buckets:
+        if not counts.get(get_bucket_key(bucket)):
+            continue
+
+        if bucket == current:
+            if include_current:
+                flush_bucket(bucket, counts[get_bucket_key(bucket)])
+            continue
+
+        if cache.add(get_bucket_key(bucket, 'claimed'), True, PROGRESS_CACHE_TIMEOUT):
+            flush_bucket(bucket, counts[get_bucket_key(bucket)])
+
+def flush_bucket(bucket, count):
+    slot_keys = [get_bucket_key(bucket, slot) for slot in range(1, count + 1)]
+    pairs     = {get_heartbeat_key(*pair): pair for pair in cache.get_many(slot_keys).values()}
+
+    heartbeats = {
+        pairs[key]: heartbeat for key, heartbeat in cache.get_many(list(pairs)).items()
+    }
+
+    if heartbeats:
+        write_progress(heartbeats)
+
+    if bucket != get_bucket():
+        cache.delete_many(slot_keys + [get_bucket_key(bucket)])
+
+def write_progress(heartbeats):
+    items = list(heartbeats.items())
+
+    with transaction.atomic():
+        for i in range(0, len(items), PROGRESS_FLUSH_SIZE):
+            upsert_progress(dict(items[i:i + PROGRESS_FLUSH_SIZE]))
+
+        completed_pairs = {
+            (user_id, heartbeat['product_id'])
+            for (user_id, _), heartbeat in heartbeats.items() if heartbeat['is_completed']
+        }
+
+        if completed_pairs:
+            refresh_product_progress(completed_pairs)
+
+def upsert_progress(heartbeats):
+    # 없는 행을 먼저 넣고(충돌은 무시) 모든 행을 GREATEST 로 갱신한다.
+    # 다른 워커와 INSERT 가 겹쳐도 뒤의 UPDATE 가 값을 반영하고, 늦게 도착한 작은 값이 진도를 되돌리지 않는다
+    LectureProgress.objects.bulk_create([
+        LectureProgress(
+            user_id         = user_id,
+            product_id      = heartbeat['product_id'],
+            lecture_id      = lecture_id,
+            watched_seconds = heartbeat['watched_seconds'],
+            is_completed    = heartbeat['is_completed']
+        ) for (user_id, lecture_id), heartbeat in heartbeats.items()
+    ], ignore_conflicts=True)
+
+    pairs = Q()
+    for user_id, lecture_id in heartbeats:
+        pairs |= Q(user_id=user_id, lecture_id=lecture_id)
+
+    LectureProgress.objects.filter(pairs).update(
+        watched_seconds = Greatest(F('watched_seconds'), Case(
+            *[
+                When(user_id=user_id, lecture_id=lecture_id, then=Value(heartbeat['watched_seconds']))
+                for (user_id, lecture_id), heartbeat in heartbeats.items()
+            ],
+            default = F('watched_seconds')
+        )),
+        is_completed    = Case(
+            *[
+                When(user_id=user_id, lecture_id=lecture_id, then=Value(True))
+                for (user_id, lecture_id), heartbeat in heartbeats.items() if heartbeat['is_completed']
+            ],
+            default = F('is_completed')
+        ),
+        updated_at      = timezone.now()
+    )
+
+def refresh_product_progress(pairs):
+    user_ids    = {user_id for user_id, _ in pairs}
+    product_ids = {product_id for _, product_id in pairs}
+
+    lecture_counts = dict(
+        Lecture.objects.filter(product_id__in=product_ids).
+        values('product_id').annotate(count=Count('id')).values_list('product_id', 'count')
+    )
+
+    completed_counts = {
+        (row['user_id'], row['product_id']): row['count']
+        for row in LectureProgress.objects.filter(
+            user_id__in    = user_ids,
+            product_id__in = product_ids,
+            is_completed   = True
+        ).values('user_id', 'product_id').annotate(count=Count('id'))
+    }
+
+    rollups = {}
+    for user_id, product_id in pairs:
+        completed     = completed_counts.get((user_id, product_id), 0)
+        lecture_count = lecture_counts.get(product_id, 0)
+        rollups[(user_id, product_id)] = (
+            completed,
+            min(completed * 100 // lecture_count, 100) if lecture_count else 0
+        )
+
+    ProductProgress.objects.bulk_create([
+        ProductProgress(
+            user_id                 = user_id,
+            product_id              = product_id,
+            completed_lecture_count = completed,
+            percent                 = percent
+        ) for (user_id, product_id), (completed, percent) in rollups.items()
+    ], ignore_conflicts=True)
+
+    # 완료한 강의 수는 줄지 않으므로, 동시에 계산한 워커 중 늦게 커밋한 쪽이 작은 값으로 덮어쓰지 않게 GREATEST 로 갱신
+    for (user_id, product_id), (completed, percent) in rollups.items():
+        ProductProgress.objects.filter(user_id=user_id, product_id=product_id).update(
+            completed_lecture_count = Greatest(F('completed_lecture_count'), Value(completed)),
+            percent                 = Greatest(F('percent'), Value(percent)),
+            updated_at              = timezone.now()
+        )
+
+    bump_user_versions(user_ids)
@@ -0,0 +1,113 @@
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch          import receiver
+from django.utils             import timezone
+
+from product.models     import (
+    Product,
+    Chapter,
+    Lecture,
+    LectureVideo,
+    LectureContent,
+    LectureContentDescription,
+    LectureContentImageUrl,
+    CommunityComment,
+    CommunityLike,
+    ProductProgress,
+    change_community_count
+)
+from user.models        import User, UserCoupon, UserProduct, RecentlyView, ProductLike
+from product.curriculum import schedule_curriculum_refresh
+from product.versions   import bump_catalog_version, bump_user_versions
+
+@receiver(post_save, sender=Chapter)
+@receiver(post_delete, sender=Chapter)
+@receiver(post_save, sender=Lecture)
+@receiver(post_delete, sender=Lecture)
+def refresh_product_curriculum(sender, instance, **kwargs):
+    schedule_curriculum_refresh(instance.product_id)
+
+@receiver(post_save, sender=LectureVideo)
+@receiver(pre_delete, sender=LectureVideo)
+def refresh_video_curriculum(sender, instance, **kwargs):
+    for product_id in Lecture.objects.filter(video_id=instance.id).values_list('product_id', flat=True):
+        schedule_curriculum_refresh(product_id)
+
+# 강의 ETag 는 Lecture/LectureContent 의 updated_at 으로 만들므로 참조하는 행이 바뀌면 updated_at 을 올린다.
+# 삭제는 SET_NULL 갱신이 updated_at 을 바꾸지 않으므로 지워지기 전에 올린다
+@receiver(post_save, sender=LectureVideo)
+@receiver(pre_delete, sender=LectureVideo)
+def touch_video_lectures(sender, instance, **kwargs):
+    Lecture.objects.filter(video_id=instance.id).update(updated_at=timezone.now())
+
+@receiver(post_save, sender=LectureContentDescription)
+@receiver(pre_delete, sender=LectureContentDescription)
+def touch_description_contents(sender, instance, **kwargs):
+    LectureContent.objects.filter(description_id=instance.id).update(updated_at=timezone.now())
+
+@receiver(post_save, sender=LectureContentImageUrl)
+@receiver(pre_delete, sender=LectureContentImageUrl)
+def touch_image_url_contents(sender, instance, **kwargs):
+    LectureContent.objects.filter(image_url_id=instance.id).update(updated_at=timezone.now())
+
+# 삭제는 쿼리셋 delete 나 CASCADE 라도 post_delete 를 보내고, 그 신호는 삭제와 같은 트랜잭션 안에서 실행된다.
+# 저장은 CommunityCountedModel.save 가, bulk_create 는 CommunityCountQuerySet 이 같은 트랜잭션으로 묶는다
+@receiver(post_save, sender=CommunityComment)
+@receiver(post_save, sender=CommunityLike)
+def increase_community_count(sender, instance, created, using, **kwargs):
+    if created:
+        change_community_count(instance.community_id, sender.count_field, 1, using=using)
+
+@receiver(post_delete, sender=CommunityComment)
+@receiver(post_delete, sender=CommunityLike)
+def decrease_community_count(sender, instance, using, **kwargs):
+    change_community_count(instance.community_id, sender.count_field, -1, using=using)
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductLike)
+@receiver(post_delete, sender=ProductLike)
+def change_catalog_version(sender, instance, **kwargs):
+    bump_catalog_version()
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def change_user_version(sender, instance, **kwargs):
+    bump_user_versions([instance.id])
+
+@receiver(post_save, sender=UserCoupon)
+@receiver(post_delete, sender=UserCoupon)
+@receiver(post_save, sender=UserProduct)
+@receiver(post_delete, sender=UserProduct)
+@receiver(post_save, sender=RecentlyView)
+@receiver(post_delete, sender=RecentlyView)
+@receiver(post_save, sender=ProductLike)
+@receiver(post_delete, sender=ProductLike)
+@receiver(post_save, sender=ProductProgress)
+@receiver(post_delete, sender=ProductProgress)
+def change_owner_version(sender, instance, **kwargs):
+    bump_user_versions([instance.user_id])
+
+@receiver(m2m_changed, sender=UserCoupon)
+@receiver(m2m_changed, sender=UserProduct)
+@receiver(m2m_changed, sender=RecentlyView)
+@receiver(m2m_changed, sender=ProductLike)
+def change_related_user_version(sender, instance, action, pk_set, **kwargs):
+    # user.coupon.add() 같은 관계 매니저 쓰기는 through 모델의 post_save 를 보내지 않는다
+    if isinstance(instance, User):
+        user_ids = [instance.id] if action.startswith('post_') else []
+
+    elif action == 'pre_clear':
+        # 반대쪽에서 clear() 하면 지워지기 전에 관련 유저를 찾아 둔다
+        field    = next(
+            field for field in sender._meta.get_fields()
+            if field.is_relation and field.related_model is type(instance)
+        )
+        user_ids = sender.objects.filter(**{field.name: instance}).values_list('user_id', flat=True)
+
+    else:
+        user_ids = pk_set if action in ('post_add', 'post_remove') else []
+
+    if sender is ProductLike and action.startswith('post_'):
+        bump_catalog_version()
+
+    bump_user_versions(user_ids or [])
@@ -1,8 +1,20 @@
-from datetime       import date, timedelta
+import io
+import json
+import asyncio
+from datetime       import date, datetime, timedelta
+from decimal        import Decimal
+from unittest       import mock
 
-from django.test    import Client, TransactionTestCase
+from asgiref.sync   import async_to_sync, sync_to_async
+from django.test    import Client, RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.http    import JsonResponse
+from django.core.management import call_command
+from django.core.cache import cache
 from django.urls    import reverse
-from django.db      import connection
+from django.db      import connection, transaction
+from django.views   import View
+from prometheus_client import REGISTRY
 
 from product.models import (
     Product,
@@ -11,12 +23,27 @@ from product.models import (
     SubCategory,
     Difficulty,
     Chapter,
+    Lecture,
+    LectureVideo,
+    LectureComment,
+    LectureContent,
+    LectureContentDescription,
+    LectureContentImageUrl,
+    LectureProgress,
+    ProductProgress,
     Community,
+    CommunityComment,
+    CommunityLike,
     Signature
 )
-from user.models    import User
+from user.models    import User, RecentlyView, RECENTLY_VIEW_LIMIT
 from kit.models     import Kit
 from core.utils     import issue_token
+from core.responses import FastJsonResponse, StreamingJsonResponse
+from core.replicas  import ReplicaRouter, ReplicaReadMixin
+from core.metrics   import observe_s3
+from clnass_101.query_profiler import QueryProfilerMiddleware, NPlusOneError, get_fingerprint
+from product        import progress
 
 class TestProductDetailView(TransactionTestCase):
     
@@ -124,7 +151,11 @@ class TestProductDetailView(TransactionTestCase):
             cursor.execute('truncate users')
             cursor.execute('truncate products')
             cursor.execute('truncate chapters')
+            cursor.execute('truncate lectures')
+            cursor.execute('truncate lecture_videos')
             cursor.execute('truncate communities')
+            cursor.execute('truncate community_comments')
+            cursor.execute('truncate community_likes')
             cursor.execute('truncate users_coupons')
             cursor.execute('truncate coupons')
             cursor.execute('truncate difficulties')
@@ -234,6 +265,38 @@ class TestProductDetailView(TransactionTestCase):
             [1, 2, 3]
         )
     
+    def test_product_detail_curriculum_follows_lecture_changes(self):
+        url = reverse('products', args=[1])
+
+        chapter = Chapter.objects.get(product_id=self.product.id, order=1)
+        video   = LectureVideo.objects.create(video_url='test_video_url')
+        lecture = Lecture.objects.create(
+            name       = 'lecture1',
+            product_id = self.product.id,
+            chapter    = chapter,
+            video      = video,
+            order      = 1
+        )
+
+        response = self.client.get(url, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['CLASS']['curriculum'][0]['chapterDetail'],
+            [{'lectureNum': 1, 'lectureTitle': 'lecture1', 'lectureVideoUrl': 'test_video_url'}]
+        )
+
+        video.video_url = 'changed_video_url'
+        video.save()
+        lecture.delete()
+
+        response = self.client.get(url, content_type='application/json')
+
+        self.assertEqual(
+            response.json()['CLASS']['curriculum'][0]['chapterDetail'],
+            []
+        )
+
     def test_product_detail_kits_exists(self):
         url = reverse('products', args=[1])
         
@@ -254,9 +317,329 @@ class TestProductDetailView(TransactionTestCase):
         
         self.assertEqual(
             response.json()['CLASS']['community'][0]['communityId'],
-            len(response.json()['CLASS']['community'])
+            Community.objects.latest('id').id
         )
     
+    def test_product_detail_carry_first_community_page(self):
+        url = reverse('products', args=[1])
+
+        response = self.client.get(url, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['CLASS']['community']), 10)
+        self.assertEqual(len(response.json()['CLASS']['creatorCommunity']), 3)
+        self.assertIsNotNone(response.json()['CLASS']['communityCursor'])
+
+    def test_community_list_keyset_pagination(self):
+        url = reverse('product_community', args=[1])
+
+        response = self.client.get(url, {'limit': 5})
+
+        self.assertEqual(response.status_code, 200)
+        first_page = [community['communityId'] for community in response.json()['COMMUNITY']]
+
+        response = self.client.get(
+            url, {'limit': 10, 'cursor': response.json()['nextCursor']}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        second_page = [community['communityId'] for community in response.json()['COMMUNITY']]
+
+        self.assertEqual(first_page + second_page, list(range(13, 0, -1)))
+        self.assertIsNone(response.json()['nextCursor'])
+
+    def test_community_list_creator_only(self):
+        url = reverse('product_community', args=[1])
+
+        response = self.client.get(url, {'creator': 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {community['communityUserInfo']['id'] for community in response.json()['COMMUNITY']},
+            {self.creator.id}
+        )
+
+    def test_community_list_counts(self):
+        url = reverse('product_community', args=[1])
+
+        community = Community.objects.latest('id')
+        CommunityComment.objects.create(content='comment', user=self.user, community=community)
+        CommunityLike.objects.create(user=self.user, community=community)
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['COMMUNITY'][0]['commentCount'], 1)
+        self.assertEqual(response.json()['COMMUNITY'][0]['likeCount'], 1)
+
+    def test_community_counts_follow_comment_and_like_writes(self):
+        community = Community.objects.latest('id')
+
+        comment = CommunityComment.objects.create(content='comment', user=self.user, community=community)
+        like    = CommunityLike.objects.create(user=self.user, community=community)
+        CommunityLike.objects.create(user=self.creator, community=community)
+
+        community.refresh_from_db()
+        self.assertEqual((community.comment_count, community.like_count), (1, 2))
+
+        comment.delete()
+        like.delete()
+
+        community.refresh_from_db()
+        self.assertEqual((community.comment_count, community.like_count), (0, 1))
+
+    def test_community_counts_follow_bulk_create_and_queryset_delete(self):
+        community = Community.objects.latest('id')
+        member    = User.objects.create(name='홍길동', nick_name='길동')
+
+        CommunityComment.objects.bulk_create([
+            CommunityComment(content='comment', user=self.user, community=community),
+            CommunityComment(content='comment', user=member, community=community)
+        ])
+        CommunityLike.objects.bulk_create([
+            CommunityLike(user=self.user, community=community),
+            CommunityLike(user=member, community=community)
+        ])
+
+        community.refresh_from_db()
+        self.assertEqual((community.comment_count, community.like_count), (2, 2))
+
+        CommunityComment.objects.filter(user=self.user).delete()
+        member.delete()
+
+        community.refresh_from_db()
+        self.assertEqual((community.comment_count, community.like_count), (0, 1))
+
+    def test_community_comment_is_rolled_back_with_its_count(self):
+        community = Community.objects.latest('id')
+
+        with mock.patch('product.signals.change_community_count', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                CommunityComment.objects.create(content='comment', user=self.user, community=community)
+
+        self.assertFalse(CommunityComment.objects.filter(community=community).exists())
+
+    def test_reconcile_community_counts_command(self):
+        community = Community.objects.latest('id')
+        CommunityLike.objects.create(user=self.user, community=community)
+        Community.objects.update(comment_count=5, like_count=5)
+
+        call_command('reconcile_community_counts', stdout=io.StringIO())
+
+        community.refresh_from_db()
+        self.assertEqual((community.comment_count, community.like_count), (0, 1))
+
+    def test_community_list_invalid_cursor(self):
+        url = reverse('product_community', args=[1])
+
+        response = self.client.get(url, {'cursor': 'invalid'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['MESSAGE'], 'VALUE_ERROR')
+
+    def test_product_detail_fields(self):
+        response = self.client.get(
+            reverse('products', args=[1]) + '?fields=title,price,isLike', **self.header
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['CLASS']), {'title', 'price', 'isLike'})
+
+    def test_product_detail_unknown_field(self):
+        response = self.client.get(reverse('products', args=[1]) + '?fields=title,owner')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['MESSAGE'], 'VALUE_ERROR')
+
+    def test_product_batch(self):
+        other = Product.objects.create(
+            name            = 'other',
+            price           = 20000,
+            sale            = 0,
+            start_date      = date.today(),
+            thumbnail_image = 'other_thumbnail_image_url',
+            main_category   = self.main_categories,
+            sub_category    = self.sub_categories,
+            difficulty      = self.difficulty,
+            creator         = self.creator
+        )
+        self.user.product_like.add(other)
+
+        response = self.client.get(
+            reverse('product_batch') + f'?ids={self.product.id},{other.id},999', **self.header
+        )
+        result   = response.json()['CLASSES']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(result[str(self.product.id)]['subImages'][0]['imageUrl'], 'test_url0')
+        self.assertEqual(result[str(self.product.id)]['kitInfo'][0]['kitName'], 'test_kit')
+        self.assertFalse(result[str(self.product.id)]['isLike'])
+        self.assertTrue(result[str(other.id)]['isLike'])
+        self.assertEqual(result[str(other.id)]['likeCount'], 1)
+        self.assertIsNone(result['999'])
+        self.assertNotIn('community', result[str(other.id)])
+
+    def test_product_batch_query_count_does_not_grow(self):
+        for i in range(5):
+            Product.objects.create(
+                name            = 'product' + str(i),
+                price           = 10000,
+                sale            = 0,
+                start_date      = date.today(),
+                thumbnail_image = 'test_thumbnail_image_url',
+                main_category   = self.main_categories,
+                sub_category    = self.sub_categories,
+                difficulty      = self.difficulty,
+                creator         = self.creator,
+                curriculum      = []
+            )
+        ids = ','.join(str(product_id) for product_id in Product.objects.values_list('id', flat=True))
+
+        with self.assertNumQueries(7):
+            self.client.get(reverse('product_batch') + f'?ids={self.product.id}', **self.header)
+
+        with self.assertNumQueries(7):
+            self.client.get(reverse('product_batch') + f'?ids={ids}', **self.header)
+
+    def test_product_batch_fills_missing_curricula_at_once(self):
+        for i in range(5):
+            Product.objects.create(
+                name            = 'product' + str(i),
+                price           = 10000,
+                sale            = 0,
+                start_date      = date.today(),
+                thumbnail_image = 'test_thumbnail_image_url',
+                main_category   = self.main_categories,
+                sub_category    = self.sub_categories,
+                difficulty      = self.difficulty,
+                creator         = self.creator
+            )
+        ids = ','.join(str(product_id) for product_id in Product.objects.values_list('id', flat=True))
+        url = reverse('product_batch') + '?fields=title,curriculum&ids='
+
+        query_counts = []
+        for product_ids in [str(self.product.id), ids]:
+            Product.objects.update(curriculum=None)
+
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url + product_ids)
+
+            self.assertEqual(response.status_code, 200)
+            query_counts.append(len(context.captured_queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(
+            response.json()['CLASSES'][str(self.product.id)]['curriculum'],
+            Product.objects.get(id=self.product.id).curriculum
+        )
+        self.assertFalse(Product.objects.filter(curriculum=None).exists())
+
+    def test_product_batch_fail_missing_relation(self):
+        Product.objects.filter(id=self.product.id).update(sub_category=None)
+
+        response = self.client.get(reverse('product_batch') + f'?ids={self.product.id}')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['MESSAGE'], 'ATTRIBUTE_ERROR')
+
+    def test_product_batch_invalid_ids(self):
+        response = self.client.get(reverse('product_batch') + '?ids=1,a')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['MESSAGE'], 'VALUE_ERROR')
+
+    def test_product_batch_too_many_ids(self):
+        ids      = ','.join(str(product_id) for product_id in range(1, 52))
+        response = self.client.get(reverse('product_batch') + f'?ids={ids}')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['MESSAGE'], 'TOO_MANY_PRODUCTS')
+
+    def test_product_detail_metrics(self):
+        labels = {'view': 'products', 'method': 'GET', 'status': '200'}
+        before = REGISTRY.get_sample_value('http_request_duration_seconds_count', labels) or 0
+
+        self.client.get(reverse('products', args=[1]))
+
+        self.assertEqual(REGISTRY.get_sample_value('http_request_duration_seconds_count', labels), before + 1)
+        self.assertGreater(REGISTRY.get_sample_value('http_request_db_queries_sum', {'view': 'products'}), 0)
+
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'http_request_duration_seconds_bucket{', response.content)
+
+    def test_product_detail_not_modified(self):
+        url  = reverse('products', args=[1])
+        etag = self.client.get(url, **self.header)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.header)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_product_detail_etag_changes_with_like(self):
+        url  = reverse('products', args=[1])
+        etag = self.client.get(url, **self.header)['ETag']
+
+        self.user.product_like.add(self.product)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['CLASS']['isLike'])
+
+    def test_product_detail_etag_changes_with_community_counts(self):
+        url  = reverse('products', args=[1])
+        etag = self.client.get(url, **self.header)['ETag']
+
+        CommunityLike.objects.create(user=self.user, community=Community.objects.latest('id'))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.header)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_product_detail_etag_changes_next_day(self):
+        url  = reverse('products', args=[1])
+        etag = self.client.get(url, **self.header)['ETag']
+
+        with mock.patch('product.versions.date') as mock_date:
+            mock_date.today.return_value = date.today() + timedelta(days=1)
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.header)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_product_detail_etag_differs_per_user(self):
+        url  = reverse('products', args=[1])
+        etag = self.client.get(url, **self.header)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_my_page_etag_changes_with_recently_view_and_like(self):
+        url = reverse('products', args=[1])
+        self.client.get(url, **self.header)
+
+        etag = self.client.get('/user/mypage', **self.header)['ETag']
+
+        response = self.client.get('/user/mypage', HTTP_IF_NONE_MATCH=etag, **self.header)
+
+        self.assertEqual(response.status_code, 304)
+
+        self.client.get(url, **self.header)
+
+        response = self.client.get('/user/mypage', HTTP_IF_NONE_MATCH=etag, **self.header)
+
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        self.user.product_like.add(self.product)
+
+        response = self.client.get('/user/mypage', HTTP_IF_NONE_MATCH=etag, **self.header)
+
+        self.assertEqual(response.status_code, 200)
+
     def test_display_is_take_class_take_possible_now(self):
         url = reverse('products', args=[1])
         
@@ -309,3 +692,878 @@ class TestProductDetailView(TransactionTestCase):
             '기용좌',
             response.json()['CLASS']['classOwner']
         )
+
+    def test_product_detail_recently_view_is_not_duplicated(self):
+        url = reverse('products', args=[1])
+
+        for _ in range(2):
+            response = self.client.get(
+                url,
+                content_type='application/json',
+                **self.header
+            )
+
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(
+            RecentlyView.objects.filter(user_id=self.user.id).count(),
+            1
+        )
+
+    def test_product_detail_recently_view_is_bounded(self):
+        for i in range(RECENTLY_VIEW_LIMIT + 1):
+            product = Product.objects.create(
+                name            = 'viewed' + str(i),
+                price           = 10000.00,
+                sale            = 0.0,
+                start_date      = date.today(),
+                thumbnail_image = 'test_thumbnail_image_url',
+                sub_category    = self.sub_categories,
+                difficulty      = self.difficulty,
+                creator         = self.creator
+            )
+
+            response = self.client.get(
+                reverse('products', args=[product.id]),
+                content_type='application/json',
+                **self.header
+            )
+
+            self.assertEqual(response.status_code, 200)
+
+        views = RecentlyView.objects.filter(user_id=self.user.id)
+
+        self.assertEqual(views.count(), RECENTLY_VIEW_LIMIT)
+        self.assertFalse(views.filter(product__name='viewed0').exists())
+
+class TestMainPageView(TransactionTestCase):
+
+    def setUp(self):
+        self.client = Client()
+
+        self.main_categories = MainCategory.objects.create(
+            id   = 1,
+            name = '크리에이티브'
+        )
+
+        self.sub_categories = SubCategory.objects.create(
+            id   = 11,
+            name = '데이터/개발'
+        )
+
+        self.difficulty = Difficulty.objects.create(
+            name = '초급자'
+        )
+
+        self.creator = User.objects.create(
+            name       = '송은우',
+            nick_name  = '신의 코드 송은우',
+            is_creator = True
+        )
+
+        for i, (price, sale) in enumerate([(10000, 0.5), (30000, 0.1), (20000, 0.0)], start=1):
+            Product.objects.create(
+                name            = 'product' + str(i),
+                price           = price,
+                sale            = sale,
+                start_date      = date.today(),
+                thumbnail_image = 'test_thumbnail_image_url',
+                main_category   = self.main_categories,
+                sub_category    = self.sub_categories,
+                difficulty      = self.difficulty,
+                creator         = self.creator
+            )
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute('set foreign_key_checks=0')
+            cursor.execute('truncate main_categories')
+            cursor.execute('truncate sub_categories')
+            cursor.execute('truncate users')
+            cursor.execute('truncate products')
+            cursor.execute('truncate difficulties')
+            cursor.execute('set foreign_key_checks=1')
+
+    def test_main_page_filter_price_range(self):
+        response = self.client.get('/products/main?min_price=10000&max_price=25000')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(product['finalPrice'] for product in response.json()['RESULT']),
+            [20000]
+        )
+
+    def test_main_page_sort_by_price(self):
+        response = self.client.get('/products/main?sorting=price_asc')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [product['finalPrice'] for product in response.json()['RESULT']],
+            [5000, 20000, 27000]
+        )
+
+        response = self.client.get('/products/main?sorting=price_desc')
+
+        self.assertEqual(
+            [product['finalPrice'] for product in response.json()['RESULT']],
+            [27000, 20000, 5000]
+        )
+
+    def test_main_page_sort_by_sale(self):
+        response = self.client.get('/products/main?sorting=sale')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [product['title'] for product in response.json()['RESULT']],
+            ['product1', 'product2', 'product3']
+        )
+
+    def test_main_page_exclude_deleted_product(self):
+        Product.objects.filter(name='product1').update(is_deleted=True)
+
+        response = self.client.get('/products/main')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(
+            'product1',
+            [product['title'] for product in response.json()['RESULT']]
+        )
+
+    def test_product_manager_excludes_deleted_product(self):
+        product = Product.objects.get(name='product1')
+        product.is_deleted = True
+        product.save()
+
+        self.assertFalse(Product.objects.filter(name='product1').exists())
+        self.assertTrue(Product.all_objects.filter(name='product1').exists())
+        self.assertEqual(Product.objects.count(), 2)
+
+    def test_main_page_etag_changes_when_product_deleted(self):
+        etag    = self.client.get('/products/main')['ETag']
+        product = Product.objects.get(name='product1')
+        product.is_deleted = True
+        product.save()
+
+        response = self.client.get('/products/main', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_main_page_not_modified_until_catalog_changes(self):
+        etag = self.client.get('/products/main')['ETag']
+
+        response = self.client.get('/products/main', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+        product = Product.objects.get(name='product1')
+        product.price = 50000
+        product.save()
+
+        response = self.client.get('/products/main', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_main_page_stream(self):
+        response = self.client.get('/products/main?stream=true&sorting=price_asc')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+
+        result = json.loads(b''.join(response.streaming_content))
+
+        self.assertEqual(
+            [product['finalPrice'] for product in result['RESULT']],
+            [5000, 20000, 27000]
+        )
+        self.assertEqual(result['RESULT'][0]['creator'], '송은우')
+
+    def test_main_page_stream_empty(self):
+        response = self.client.get('/products/main?stream=true&min_price=1000000')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['MESSAGE'], 'NO_RESULT')
+
+    def test_main_page_stream_reads_keyset_pages(self):
+        for sorting in ['price_asc', 'price_desc', 'popular', 'updated', 'sale', '']:
+            expected = [
+                product['id'] for product in
+                self.client.get(f'/products/main?fields=id&sorting={sorting}').json()['RESULT']
+            ]
+
+            with mock.patch('product.views.MAIN_PAGE_STREAM_CHUNK_SIZE', 1):
+                response = self.client.get(f'/products/main?stream=true&fields=id&sorting={sorting}')
+                result   = json.loads(b''.join(response.streaming_content))
+
+            self.assertEqual(
+                sorted(product['id'] for product in result['RESULT']), sorted(expected)
+            )
+
+            if sorting.startswith('price'):
+                self.assertEqual([product['id'] for product in result['RESULT']], expected)
+
+    @override_settings(SQL_SLOW_QUERY_MS=0, SQL_LOG_SAMPLE_RATE=0)
+    def test_main_page_stream_pages_are_observed(self):
+        with mock.patch('product.views.MAIN_PAGE_STREAM_CHUNK_SIZE', 1):
+            response = Client().get('/products/main?stream=true')
+
+            with self.assertLogs('clnass_101.sql_logging', 'WARNING') as logs:
+                b''.join(response.streaming_content)
+
+        # 뷰에서 읽은 첫 페이지 다음의 두 페이지와, 끝을 확인하는 빈 페이지
+        self.assertEqual(len(logs.output), 3)
+        self.assertTrue(all('/products/main' in line for line in logs.output))
+
+    def test_main_page_fields(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/products/main?fields=id,title,finalPrice&sorting=price_asc')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['RESULT'][0],
+            {'id': Product.objects.get(name='product1').id, 'title': 'product1', 'finalPrice': 5000}
+        )
+
+    def test_main_page_unknown_field(self):
+        response = self.client.get('/products/main?fields=id,curriculum')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['MESSAGE'], 'VALUE_ERROR')
+
+    @override_settings(SQL_SLOW_QUERY_MS=0, SQL_LOG_SAMPLE_RATE=0)
+    def test_main_page_slow_queries_are_logged_with_path(self):
+        with self.assertLogs('clnass_101.sql_logging', 'WARNING') as logs:
+            Client().get('/products/main')
+
+        self.assertTrue(all('/products/main' in line for line in logs.output))
+        self.assertTrue(any('FROM `products`' in line for line in logs.output))
+
+    def test_main_page_invalid_price_value(self):
+        response = self.client.get('/products/main?min_price=abc')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['MESSAGE'], 'VALUE_ERROR')
+
+class TestLectureCommentView(TransactionTestCase):
+
+    def setUp(self):
+        self.client = Client()
+
+        self.user = User.objects.create(
+            name      = '김민구',
+            nick_name = '민구좌'
+        )
+
+        self.header = {
+            'HTTP_Authorization': issue_token(self.user.id),
+        }
+
+        self.product = Product.objects.create(
+            name            = 'test',
+            price           = 10000.00,
+            sale            = 0.0,
+            start_date      = date.today(),
+            thumbnail_image = 'test_thumbnail_image_url'
+        )
+
+        self.lecture = Lecture.objects.create(
+            name       = 'lecture1',
+            product    = self.product,
+            order      = 1
+        )
+
+        self.roots = [
+            LectureComment.objects.create(
+                content = 'root' + str(i),
+                user    = self.user,
+                lecture = self.lecture
+            ) for i in range(3)
+        ]
+
+        self.reply = LectureComment.objects.create(
+            content = 'reply',
+            user    = self.user,
+            lecture = self.lecture,
+            parent  = self.roots[0]
+        )
+
+        self.nested_reply = LectureComment.objects.create(
+            content = 'nested_reply',
+            user    = self.user,
+            lecture = self.lecture,
+            parent  = self.reply
+        )
+
+        self.url = reverse('lecture_comments', args=[self.product.id, self.lecture.id])
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute('set foreign_key_checks=0')
+            cursor.execute('truncate users')
+            cursor.execute('truncate products')
+            cursor.execute('truncate lectures')
+            cursor.execute('truncate lecture_comments')
+            cursor.execute('set foreign_key_checks=1')
+
+    def test_lecture_comment_reply_has_root(self):
+        self.assertEqual(self.reply.root_id, self.roots[0].id)
+        self.assertEqual(self.nested_reply.root_id, self.roots[0].id)
+
+    def test_lecture_comment_get_thread_tree(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+
+        comments = response.json()['COMMENTS']
+
+        self.assertEqual(
+            [comment['content'] for comment in comments],
+            ['root2', 'root1', 'root0']
+        )
+        self.assertEqual(comments[2]['replies'][0]['content'], 'reply')
+        self.assertEqual(
+            comments[2]['replies'][0]['replies'][0]['content'],
+            'nested_reply'
+        )
+
+    def test_lecture_comment_cursor_pagination(self):
+        response = self.client.get(self.url, {'limit': 2})
+
+        self.assertEqual(len(response.json()['COMMENTS']), 2)
+
+        response = self.client.get(
+            self.url, {'limit': 2, 'cursor': response.json()['nextCursor']}
+        )
+
+        self.assertEqual(
+            [comment['content'] for comment in response.json()['COMMENTS']],
+            ['root0']
+        )
+        self.assertEqual(len(response.json()['COMMENTS'][0]['replies']), 1)
+        self.assertIsNone(response.json()['nextCursor'])
+
+    def test_lecture_comment_post_reply(self):
+        response = self.client.post(
+            self.url,
+            {'content': 'new_reply', 'parent_id': self.nested_reply.id},
+            content_type='application/json',
+            **self.header
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            LectureComment.objects.get(id=response.json()['commentId']).root_id,
+            self.roots[0].id
+        )
+
+    def test_lecture_comment_post_fail_invalid_parent_id(self):
+        for parent_id in ['abc', [1], {'id': 1}]:
+            response = self.client.post(
+                self.url,
+                {'content': 'new_reply', 'parent_id': parent_id},
+                content_type='application/json',
+                **self.header
+            )
+
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['MESSAGE'], 'VALUE_ERROR')
+
+    def test_lecture_comment_delete_reply_keeps_thread(self):
+        self.reply.delete()
+
+        nested_reply = LectureComment.objects.get(id=self.nested_reply.id)
+
+        self.assertIsNone(nested_reply.parent_id)
+        self.assertEqual(nested_reply.root_id, self.roots[0].id)
+
+        comments = self.client.get(self.url).json()['COMMENTS']
+
+        self.assertEqual(
+            [reply['content'] for reply in comments[2]['replies']],
+            ['nested_reply']
+        )
+
+    def test_lecture_comment_delete_root_deletes_thread(self):
+        self.roots[0].delete()
+
+        self.assertFalse(
+            LectureComment.objects.filter(id__in=[self.reply.id, self.nested_reply.id]).exists()
+        )
+        self.assertEqual(LectureComment.objects.filter(root=None).count(), 2)
+
+    def test_lecture_comment_get_fail_lecture_not_exist(self):
+        response = self.client.get(
+            reverse('lecture_comments', args=[self.product.id, 100])
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['MESSAGE'], 'LECTURE_NOT_EXIST')
+
+class TestLectureProgressView(TransactionTestCase):
+
+    def setUp(self):
+        self.client = Client()
+
+        self.user = User.objects.create(
+            name      = '김민구',
+            nick_name = '민구좌'
+        )
+
+        self.header = {
+            'HTTP_Authorization': issue_token(self.user.id),
+        }
+
+        self.product = Product.objects.create(
+            name            = 'test',
+            price           = 10000.00,
+            sale            = 0.0,
+            start_date      = date.today(),
+            thumbnail_image = 'test_thumbnail_image_url',
+            sub_category    = SubCategory.objects.create(name='데이터/개발'),
+            difficulty      = Difficulty.objects.create(name='초급자'),
+            creator         = self.user
+        )
+
+        self.lectures = [
+            Lecture.objects.create(
+                name    = 'lecture' + str(i),
+                product = self.product,
+                order   = i
+            ) for i in range(1, 5)
+        ]
+
+    def tearDown(self):
+        progress.flush_progress()
+        cache.clear()
+
+        with connection.cursor() as cursor:
+            cursor.execute('set foreign_key_checks=0')
+            cursor.execute('truncate users')
+            cursor.execute('truncate sub_categories')
+            cursor.execute('truncate difficulties')
+            cursor.execute('truncate products')
+            cursor.execute('truncate lectures')
+            cursor.execute('truncate recently_views')
+            cursor.execute('truncate lecture_progresses')
+            cursor.execute('truncate product_progresses')
+            cursor.execute('set foreign_key_checks=1')
+
+    def send_heartbeat(self, lecture, watched_seconds, is_completed=False):
+        return self.client.post(
+            reverse('lecture_progress', args=[self.product.id, lecture.id]),
+            {'watched_seconds': watched_seconds, 'is_completed': is_completed},
+            content_type='application/json',
+            **self.header
+        )
+
+    def test_lecture_progress_heartbeats_are_coalesced(self):
+        for watched_seconds in [10, 20, 30]:
+            response = self.send_heartbeat(self.lectures[0], watched_seconds)
+            self.assertEqual(response.status_code, 202)
+
+        self.assertFalse(LectureProgress.objects.exists())
+
+        progress.flush_progress()
+
+        self.assertEqual(LectureProgress.objects.count(), 1)
+        self.assertEqual(LectureProgress.objects.get().watched_seconds, 30)
+
+    def test_lecture_progress_completion_updates_rollup(self):
+        self.send_heartbeat(self.lectures[0], 100, True)
+        self.send_heartbeat(self.lectures[1], 100, True)
+        self.send_heartbeat(self.lectures[1], 120, True)
+
+        rollup = ProductProgress.objects.get(user=self.user, product=self.product)
+
+        self.assertEqual(rollup.completed_lecture_count, 2)
+        self.assertEqual(rollup.percent, 50)
+        self.assertEqual(LectureProgress.objects.count(), 2)
+
+        response = self.client.get(
+            reverse('products', args=[self.product.id]),
+            content_type='application/json',
+            **self.header
+        )
+
+        self.assertEqual(response.json()['CLASS']['progress'], 50)
+
+    def test_lecture_progress_sets_primary_sticky_cookie(self):
+        response = self.send_heartbeat(self.lectures[0], 10)
+
+        self.assertEqual(response.cookies['use_primary'].value, '1')
+
+    def test_lecture_progress_fail_does_not_set_primary_sticky_cookie(self):
+        response = self.client.post(
+            reverse('lecture_progress', args=[100, self.lectures[0].id]),
+            {'watched_seconds': 10},
+            content_type='application/json',
+            **self.header
+        )
+
+        self.assertNotIn('use_primary', response.cookies)
+
+    def test_lecture_progress_fail_lecture_of_other_product(self):
+        response = self.client.post(
+            reverse('lecture_progress', args=[100, self.lectures[0].id]),
+            {'watched_seconds': 10},
+            content_type='application/json',
+            **self.header
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['MESSAGE'], 'LECTURE_NOT_EXIST')
+
+    def test_lecture_progress_fail_not_owned_product(self):
+        other = User.objects.create(name='김민수', nick_name='민수')
+
+        response = self.client.post(
+            reverse('lecture_progress', args=[self.product.id, self.lectures[0].id]),
+            {'watched_seconds': 10},
+            content_type='application/json',
+            HTTP_Authorization=issue_token(other.id)
+        )
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['MESSAGE'], 'NOT_OWNED_PRODUCT')
+
+    def test_lecture_progress_fail_is_completed_not_bool(self):
+        response = self.client.post(
+            reverse('lecture_progress', args=[self.product.id, self.lectures[0].id]),
+            {'watched_seconds': 10, 'is_completed': 'false'},
+            content_type='application/json',
+            **self.header
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['MESSAGE'], 'VALUE_ERROR')
+
+    def test_lecture_progress_buffer_is_shared_and_never_goes_backwards(self):
+        LectureProgress.objects.create(
+            user            = self.user,
+            product         = self.product,
+            lecture         = self.lectures[0],
+            watched_seconds = 100
+        )
+
+        self.send_heartbeat(self.lectures[0], 30)
+        self.send_heartbeat(self.lectures[1], 40)
+
+        # 하트비트는 프로세스 메모리가 아닌 공유 캐시에 쌓인다
+        self.assertEqual(
+            cache.get(progress.get_heartbeat_key(self.user.id, self.lectures[1].id))['watched_seconds'], 40
+        )
+
+        call_command('flush_lecture_progress', stdout=io.StringIO())
+
+        self.assertEqual(
+            dict(LectureProgress.objects.values_list('lecture_id', 'watched_seconds')),
+            {self.lectures[0].id: 100, self.lectures[1].id: 40}
+        )
+
+class TestLectureDetailView(TransactionTestCase):
+
+    def setUp(self):
+        self.client = Client()
+
+        self.user = User.objects.create(
+            name      = '김민구',
+            nick_name = '민구좌'
+        )
+
+        self.header = {
+            'HTTP_Authorization': issue_token(self.user.id),
+        }
+
+        self.product = Product.objects.create(
+            name            = 'test',
+            price           = 10000.00,
+            sale            = 0.0,
+            start_date      = date.today(),
+            thumbnail_image = 'test_thumbnail_image_url'
+        )
+
+        self.user.user_product.add(self.product)
+
+        self.lecture = Lecture.objects.create(
+            name    = 'lecture1',
+            product = self.product,
+            video   = LectureVideo.objects.create(video_url='test_video_url'),
+            order   = 1
+        )
+
+        for i in range(3, 0, -1):
+            LectureContent.objects.create(
+                description = LectureContentDescription.objects.create(description='description' + str(i)),
+                image_url   = LectureContentImageUrl.objects.create(image_url='image_url' + str(i)),
+                lecture     = self.lecture,
+                product     = self.product,
+                order       = i
+            )
+
+        self.url = reverse('lecture_detail', args=[self.product.id, self.lecture.id])
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute('set foreign_key_checks=0')
+            cursor.execute('truncate users')
+            cursor.execute('truncate users_products')
+            cursor.execute('truncate products')
+            cursor.execute('truncate lectures')
+            cursor.execute('truncate lecture_videos')
+            cursor.execute('truncate lecture_contents')
+            cursor.execute('truncate lecture_content_descriptions')
+            cursor.execute('truncate lecture_content_image_urls')
+            cursor.execute('set foreign_key_checks=1')
+
+    def test_lecture_detail_get_ordered_contents(self):
+        response = self.client.get(self.url, **self.header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertEqual(
+            [content['order'] for content in response.json()['LECTURE']['contents']],
+            [1, 2, 3]
+        )
+        self.assertEqual(response.json()['LECTURE']['videoUrl'], 'test_video_url')
+
+    def test_lecture_detail_not_modified(self):
+        etag = self.client.get(self.url, **self.header)['ETag']
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.header)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_lecture_detail_etag_changes_with_content(self):
+        etag = self.client.get(self.url, **self.header)['ETag']
+
+        LectureContent.objects.filter(order=3).delete()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_lecture_detail_etag_changes_with_referenced_rows(self):
+        content = LectureContent.objects.select_related('description', 'image_url').get(order=1)
+
+        for row, field in [
+            (content.description, 'description'),
+            (content.image_url, 'image_url'),
+            (self.lecture.video, 'video_url')
+        ]:
+            etag = self.client.get(self.url, **self.header)['ETag']
+
+            setattr(row, field, 'edited')
+            row.save()
+
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.header)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+
+    def test_lecture_detail_fail_not_owned_product(self):
+        other = User.objects.create(name='other')
+
+        response = self.client.get(
+            self.url, HTTP_Authorization=issue_token(other.id)
+        )
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['MESSAGE'], 'NOT_OWNED_PRODUCT')
+
+class TestFastJsonResponse(SimpleTestCase):
+    data = {
+        'RESULT': [{
+            'id'         : 1,
+            'title'      : '클래스',
+            'sale'       : Decimal('0.10'),
+            'created_at' : datetime(2026, 10, 19, 11, 30, 15, 123456),
+            'startDate'  : date(2026, 10, 19)
+        }]
+    }
+
+    def test_fast_json_response_matches_json_response(self):
+        response = FastJsonResponse(self.data)
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content), json.loads(JsonResponse(self.data).content))
+
+    def test_fast_json_response_rejects_non_dict(self):
+        with self.assertRaises(TypeError):
+            FastJsonResponse([1, 2])
+
+    def test_streaming_json_response(self):
+        response = StreamingJsonResponse(
+            (dict(self.data['RESULT'][0], id=index) for index in range(250)), 'RESULT', {'nextCursor': None}
+        )
+        result   = json.loads(b''.join(response.streaming_content))
+
+        self.assertEqual([item['id'] for item in result['RESULT']], list(range(250)))
+        self.assertEqual(result['RESULT'][0]['sale'], '0.10')
+        self.assertIsNone(result['nextCursor'])
+
+    def test_streaming_json_response_empty(self):
+        response = StreamingJsonResponse(iter([]), 'RESULT')
+
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), {'RESULT': []})
+
+class TestConnectionHealthCheck(TransactionTestCase):
+    def test_dropped_connection_is_replaced(self):
+        connection.ensure_connection()
+        connection.connection.close()
+        connection.close_if_unusable_or_obsolete()
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+            self.assertEqual(cursor.fetchone(), (1,))
+
+    def test_benchmark_connections_reports_each_strategy(self):
+        out = io.StringIO()
+
+        call_command('benchmark_connections', requests=2, stdout=out)
+
+        self.assertIn('CONN_MAX_AGE=0', out.getvalue())
+        self.assertEqual(
+            'QueuePool' in out.getvalue(), connection.vendor == 'mysql'
+        )
+
+class TestReplicaRouter(TransactionTestCase):
+    class RoutedView(ReplicaReadMixin, View):
+        def get(self, request):
+            return JsonResponse({'database': ReplicaRouter().db_for_read(Product)})
+
+        def post(self, request):
+            return JsonResponse({'database': ReplicaRouter().db_for_read(Product)})
+
+    def get_database(self, method='get', **extra):
+        request = getattr(RequestFactory(), method)('/', **extra)
+
+        return json.loads(self.RoutedView.as_view()(request).content)['database']
+
+    def test_get_reads_from_replica(self):
+        self.assertEqual(self.get_database(), 'replica')
+
+    def test_post_reads_from_primary(self):
+        self.assertEqual(self.get_database('post'), 'default')
+
+    def test_sticky_client_reads_from_primary(self):
+        self.assertEqual(self.get_database(HTTP_COOKIE='use_primary=1'), 'default')
+        self.assertEqual(self.get_database(HTTP_X_USE_PRIMARY='1'), 'default')
+
+    def test_reads_outside_views_use_primary(self):
+        self.assertEqual(ReplicaRouter().db_for_read(Product), 'default')
+
+    def test_reads_inside_transaction_use_primary(self):
+        class AtomicView(ReplicaReadMixin, View):
+            def get(self, request):
+                with transaction.atomic():
+                    return JsonResponse({'database': ReplicaRouter().db_for_read(Product)})
+
+        response = AtomicView.as_view()(RequestFactory().get('/'))
+
+        self.assertEqual(json.loads(response.content)['database'], 'default')
+
+    def test_recently_view_trim_reads_from_primary(self):
+        user    = User.objects.create(name='김민구', nick_name='민구좌')
+        product = Product.objects.create(
+            name            = 'product',
+            price           = 10000.00,
+            sale            = 0.0,
+            start_date      = date.today(),
+            thumbnail_image = 'test_thumbnail_image_url'
+        )
+        databases = []
+
+        def route_reads(execute, sql, params, many, context):
+            if sql.startswith('SELECT') and 'recently_views' in sql:
+                databases.append(ReplicaRouter().db_for_read(RecentlyView))
+            return execute(sql, params, many, context)
+
+        class RecordView(ReplicaReadMixin, View):
+            def get(self, request):
+                with connection.execute_wrapper(route_reads):
+                    RecentlyView.objects.record(user.id, product.id)
+                return JsonResponse({})
+
+        RecordView.as_view()(RequestFactory().get('/'))
+
+        self.assertTrue(databases)
+        self.assertEqual(set(databases), {'default'})
+
+    def test_writes_and_migrations_use_primary(self):
+        self.assertEqual(ReplicaRouter().db_for_write(Product), 'default')
+        self.assertFalse(ReplicaRouter().allow_migrate('replica', 'product'))
+
+class TestQueryProfilerMiddleware(TransactionTestCase):
+    def get_response(self, query_count):
+        def view(request):
+            for product_id in range(query_count):
+                Product.objects.filter(id=product_id).exists()
+            return JsonResponse({'MESSAGE': 'SUCCESS'})
+
+        return QueryProfilerMiddleware(view)(RequestFactory().get('/products/main'))
+
+    def test_fingerprint_ignores_values(self):
+        self.assertEqual(
+            get_fingerprint('SELECT * FROM `products` WHERE `id` IN (%s, %s, %s) LIMIT 21'),
+            get_fingerprint('SELECT  * FROM `products` WHERE `id` IN (%s)\nLIMIT 1')
+        )
+
+    @override_settings(QUERY_PROFILER_REPEAT_THRESHOLD=10, QUERY_PROFILER_RAISE=True)
+    def test_repeated_queries_fail_in_test_mode(self):
+        with self.assertRaises(NPlusOneError):
+            self.get_response(11)
+
+        self.get_response(10)
+
+    @override_settings(QUERY_PROFILER_REPEAT_THRESHOLD=10, QUERY_PROFILER_RAISE=False, DEBUG=True)
+    def test_profile_headers_in_debug(self):
+        response = self.get_response(11)
+
+        self.assertEqual(response['X-Query-Count'], '11')
+        self.assertEqual(response['X-Repeated-Queries'], '1')
+
+    @override_settings(QUERY_PROFILER_REPEAT_THRESHOLD=10, QUERY_PROFILER_RAISE=False, DEBUG=False)
+    def test_repeated_queries_logged_in_production(self):
+        with self.assertLogs('clnass_101.query_profiler', 'WARNING') as logs:
+            self.get_response(11)
+
+        record = json.loads(logs.records[0].getMessage())
+
+        self.assertEqual(record['event'], 'n_plus_one')
+        self.assertEqual(record['path'], '/products/main')
+        self.assertEqual(list(record['repeated'].values()), [11])
+
+    @override_settings(QUERY_PROFILER_REPEAT_THRESHOLD=10, QUERY_PROFILER_RAISE=False, DEBUG=True)
+    def test_queries_in_async_middleware_chain_are_profiled(self):
+        count_users = sync_to_async(User.objects.count, thread_sensitive=True)
+
+        async def view(request):
+            await count_users()
+            await count_users()
+            return JsonResponse({'MESSAGE': 'SUCCESS'})
+
+        middleware = QueryProfilerMiddleware(view)
+        response   = async_to_sync(middleware)(RequestFactory().get('/user/login/kakao'))
+
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        self.assertEqual(response['X-Query-Count'], '2')
+
+class TestS3Metrics(SimpleTestCase):
+    def test_s3_calls_are_timed(self):
+        @observe_s3('test_upload')
+        def upload():
+            return 'file_name'
+
+        @observe_s3('test_delete')
+        def delete():
+            raise ValueError
+
+        upload()
+        with self.assertRaises(ValueError):
+            delete()
+
+        self.assertEqual(REGISTRY.get_sample_value('s3_call_duration_seconds_count', {'operation': 'test_upload'}), 1)
+        self.assertEqual(REGISTRY.get_sample_value('s3_call_errors_total', {'operation': 'test_delete'}), 1)
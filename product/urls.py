@@ -1,8 +1,21 @@
 from django.urls import path
 
-from product.views import ProductDetailView, MainPageView
+from product.views import (
+    ProductDetailView,
+    ProductBatchView,
+    MainPageView,
+    CommunityListView,
+    LectureDetailView,
+    LectureCommentView,
+    LectureProgressView
+)
 
 urlpatterns = [
     path('/<int:product_id>', ProductDetailView.as_view(), name='products'),
     path('/main', MainPageView.as_view()),
+    path('/batch', ProductBatchView.as_view(), name='product_batch'),
+    path('/<int:product_id>/community', CommunityListView.as_view(), name='product_community'),
+    path('/<int:product_id>/lectures/<int:lecture_id>', LectureDetailView.as_view(), name='lecture_detail'),
+    path('/<int:product_id>/lectures/<int:lecture_id>/comments', LectureCommentView.as_view(), name='lecture_comments'),
+    path('/<int:product_id>/lectures/<int:lecture_id>/progress', LectureProgressView.as_view(), name='lecture_progress'),
 ]
\ No newline at end of file
@@ -0,0 +1,90 @@
+import uuid
+
+from datetime import date
+
+from django.core.cache  import cache
+from django.db          import transaction
+from django.db.models   import Exists, F, OuterRef, Subquery, Sum
+
+from product.models import Product, Community, ProductProgress
+from user.models    import ProductLike
+from core.utils     import count_subquery
+
+CATALOG_VERSION_KEY = 'version:catalog'
+
+def get_user_version_key(user_id):
+    return f'version:user:{user_id}'
+
+def get_cached_version(key):
+    # 카운터 대신 임의의 토큰을 쓴다. 캐시가 비워져도 예전 ETag 와 겹치지 않고 새 토큰이 생길 뿐이다
+    version = cache.get(key)
+
+    if version is None:
+        version = uuid.uuid4().hex
+
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+
+    return version
+
+def bump_versions(*keys):
+    # 커밋 전에 바꾸면 다른 요청이 옛 데이터로 새 ETag 를 받아 갈 수 있으므로 커밋 후에 토큰을 버린다
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+def get_catalog_version():
+    return (get_cached_version(CATALOG_VERSION_KEY),)
+
+def bump_catalog_version():
+    bump_versions(CATALOG_VERSION_KEY)
+
+def get_user_version(user_id):
+    # 마이페이지는 카탈로그(좋아요 수, 강의 정보)와 유저 본인의 쿠폰/구매/최근 본/좋아요/진도가 모두 바뀌면 달라진다
+    # 남은 수강 기간(effectiveDate)은 날짜가 바뀌어도 달라지므로 오늘 날짜도 넣는다
+    return (
+        get_cached_version(CATALOG_VERSION_KEY),
+        get_cached_version(get_user_version_key(user_id)),
+        date.today()
+    )
+
+def bump_user_versions(user_ids):
+    user_keys = [get_user_version_key(user_id) for user_id in user_ids if user_id]
+
+    if user_keys:
+        bump_versions(*user_keys)
+
+def get_product_version(product_id, user_id=None):
+    # 커뮤니티 좋아요/댓글 수는 F() 로 갱신되어 updated_at 이 바뀌지 않으므로 카운터 합계를 따로 넣는다
+    # 수강 가능 여부(isTakeClass)는 날짜에 따라 달라지므로 오늘 날짜도 넣는다
+    version = Product.objects.filter(id=product_id).annotate(
+        like_count           = count_subquery(
+            ProductLike.objects.filter(product_id=OuterRef('id')), 'product_id'
+        ),
+        is_like              = Exists(
+            ProductLike.objects.filter(user_id=user_id, product_id=OuterRef('id'))
+        ),
+        community_count      = count_subquery(
+            Community.objects.filter(product_id=OuterRef('id')), 'product_id'
+        ),
+        community_counters   = Subquery(
+            Community.objects.filter(product_id=OuterRef('id')).order_by().values('product_id').
+            annotate(total=Sum(F('like_count') + F('comment_count'))).values('total')[:1]
+        ),
+        community_updated_at = Subquery(
+            Community.objects.filter(product_id=OuterRef('id')).
+            order_by('-updated_at').values('updated_at')[:1]
+        ),
+        progress_updated_at  = Subquery(
+            ProductProgress.objects.filter(user_id=user_id, product_id=OuterRef('id')).
+            values('updated_at')[:1]
+        )
+    ).values_list(
+        'updated_at',
+        'like_count',
+        'is_like',
+        'community_count',
+        'community_counters',
+        'community_updated_at',
+        'progress_updated_at'
+    ).first()
+
+    return version and version + (date.today(),)
@@ -1,128 +1,139 @@
 import json
-from datetime       import date
+import base64
+import binascii
+import hashlib
+from datetime       import date, datetime
 
-from django.db.models import Count
+from django.db.models import Count, F, Max, OuterRef, Q
 from django.views   import View
-from django.http    import JsonResponse
+from django.http    import JsonResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
 
-from product.models import Product
-from user.models    import User, ProductLike, RecentlyView
-from core.utils     import login_decorator
+from product.models     import (
+    Product,
+    Community,
+    Lecture,
+    LectureContent,
+    LectureComment,
+    ProductProgress
+)
+from product.curriculum import refresh_curriculum, refresh_curricula
+from product.progress   import get_lecture_product_id, record_heartbeat
+from product.versions   import get_catalog_version, get_product_version, bump_user_versions
+from user.models        import User, ProductLike, RecentlyView
+from core.utils         import (
+    login_decorator,
+    get_token_user_id,
+    get_requested_fields,
+    get_projected_queryset,
+    count_subquery
+)
+from core.conditional   import ConditionalGetMixin
+from core.replicas      import ReplicaReadMixin
+from core.responses     import FastJsonResponse, StreamingJsonResponse
 
-class ProductDetailView(View):
+COMMUNITY_PAGE_SIZE     = 10
+COMMUNITY_MAX_PAGE_SIZE = 50
+COMMENT_PAGE_SIZE       = 20
+COMMENT_MAX_PAGE_SIZE   = 50
+
+MAIN_PAGE_STREAM_CHUNK_SIZE = 500
+
+PRODUCT_DETAIL_FIELDS = [
+    'mainImage',
+    'subImages',
+    'title',
+    'subCategoryName',
+    'classOwner',
+    'isTakeClass',
+    'sale',
+    'price',
+    'difficulty',
+    'likeCount',
+    'isLike',
+    'progress',
+    'curriculum',
+    'kitInfo',
+    'creatorInfo',
+    'creatorCommunity',
+    'community',
+    'communityCursor',
+    'classId'
+]
+
+PRODUCT_DETAIL_PREFETCHES = {
+    'subImages' : 'productsubimage_set',
+    'kitInfo'   : 'kit__kitsubimageurl_set'
+}
+
+# 커뮤니티는 상품마다 따로 페이지를 읽어야 해서 묶음 조회에서는 /<id>/community 로 받는다
+PRODUCT_BATCH_FIELDS   = [
+    field for field in PRODUCT_DETAIL_FIELDS
+    if field not in ('creatorInfo', 'creatorCommunity', 'community', 'communityCursor')
+]
+PRODUCT_BATCH_MAX_SIZE = 50
+
+class ProductDetailView(ReplicaReadMixin, ConditionalGetMixin, View):
+
+    def get_version(self, request, product_id):
+        return get_product_version(product_id, get_token_user_id(request))
+
+    def on_not_modified(self, request, product_id):
+        user_id = get_token_user_id(request)
+
+        if user_id:
+            RecentlyView.objects.record(user_id, product_id)
+            bump_user_versions([user_id])
     
     @login_decorator(login_required=False)
     def get(self, request, product_id):
         try:
             if not isinstance(product_id, int):
                 raise TypeError
+
+            fields  = set(get_requested_fields(request, PRODUCT_DETAIL_FIELDS))
+            product = get_detail_products(fields).get(id=product_id)
             
-            product = Product.objects.\
-                select_related(
-                    'sub_category', 'difficulty', 'creator', 'signature',
-                ).\
-                prefetch_related(
-                    'productsubimage_set',
-                    'chapter_set',
-                    'community_set',
-                    'productlike_set',
-                    'productkit_set',
-                ).get(id=product_id, is_deleted=0)
-            
-            product_sub_images = [
-                {
-                    'imageUrl' : sub_image['image_url']
-                } for sub_image in product.productsubimage_set.all().values('image_url')
-            ]
-            
-            chapters = product.chapter_set.all().\
-                prefetch_related('lecture_set').order_by('order')
-            
-            kits = [
-                product_kits.kit for product_kits in product.productkit_set.all()
-            ]
-            
-            product_communities = product.community_set.all().order_by('-updated_at')
-            
-            creator_communities = [
-                community for community in product_communities
-                if community.user_id == product.creator_id
-                   or community.user_id == product.signature_id
-            ]
+            creator_communities, _ = get_community_page(
+                product.id, user_ids=get_creator_ids(product)
+            ) if fields & {'creatorInfo', 'creatorCommunity'} else ([], None)
             
-            communities = [
-                community for community in product_communities
-            ]
+            communities, next_cursor = get_community_page(product.id) \
+                if fields & {'community', 'communityCursor'} else ([], None)
             
-            is_like = False
+            is_like  = False
+            progress = 0
             if request.user:
-                is_like = ProductLike.objects.filter(
-                    user_id    = request.user.id,
-                    product_id = product_id
-                ).exists()
-                
-                if not RecentlyView.objects.filter(
-                    user_id    = request.user.id,
-                    product_id = product.id
-                ).exists():
-                    RecentlyView.objects.create(
+                if 'isLike' in fields:
+                    is_like = ProductLike.objects.filter(
                         user_id    = request.user.id,
                         product_id = product_id
-                    )
+                    ).exists()
+
+                if 'progress' in fields:
+                    progress = ProductProgress.objects.filter(
+                        user_id    = request.user.id,
+                        product_id = product_id
+                    ).values_list('percent', flat=True).first() or 0
+                
+                RecentlyView.objects.record(request.user.id, product.id)
+                bump_user_versions([request.user.id])
             
-            product_info = {
-                'mainImage'       : product.thumbnail_image,
-                'subImages'       : product_sub_images,
-                'title'           : product.name,
-                'subCategoryName' : product.sub_category.name,
-                'classOwner'      : product.creator.nick_name if not product.signature else
-                                    product.signature.name,
-                'isTakeClass'     : '바로 수강 가능' if product.start_date <= date.today() else
-                                    str(product.start_date.month) + '월' + ' ' +
-                                    str(product.start_date.day) + '일 부터 수강 가능',
-                'sale'            : int(product.sale * 100),
-                'price'           : '{:,}원'.format(int(product.price * (1 - product.sale))),
-                'difficulty'      : f'{product.difficulty.name} 대상',
-                'likeCount'       : product.productlike_set.count(),
-                'isLike'          : is_like,
-                'curriculum'      : [{
-                                        'thumbnailImage' : chapter.thumbnail_image,
-                                        'chapterName'    : chapter.name,
-                                        'order'           : chapter.order,
-                                        'chapterDetail'  : [{
-                                                                'lectureNum'      : index+1,
-                                                                'lectureTitle'    : lecture.name,
-                                                                'lectureVideoUrl' : lecture.video_url,
-                                                            } for index, lecture in
-                                                              enumerate(chapter.lecture_set.all())]
-                                    } for chapter in chapters],
-                'kitInfo'         : [{
-                                        'mainImageUrl' : kit.main_image_url,
-                                        'kitName'      : kit.name,
-                                        'description'  : kit.description,
-                                        'subImageUrls' : [{
-                                                            'subImageUrl' : sub_image.image_url
-                                                            } for sub_image in kit.kitsubimageurl_set.all()]
-                                    } for kit in kits],
-                'creatorInfo'     : get_user_info(creator_communities[0])
-                                    if creator_communities else {},
-                'creatorCommunity': [{
-                                        'communityUserInfo'      : get_user_info(community),
-                                        'communityCommentedDate' : community.updated_at.strftime('%Y.%m.%d.'),
-                                        'comment'                : community.description,
-                                        'communityId'            : community.id
-                                    } for community in creator_communities],
-                'community'       : [{
-                                        'communityUserInfo'     : get_user_info(community),
-                                        'communityCommentedDate': community.updated_at.strftime('%Y.%m.%d.'),
-                                        'comment'               : community.description,
-                                        'communityId'           : community.id
-                                    } for community in communities],
-                'classId'         : product.id
-            }
+            product_info = serialize_product_detail(
+                product,
+                fields,
+                is_like             = is_like,
+                progress            = progress,
+                creator_communities = creator_communities,
+                communities         = communities,
+                next_cursor         = next_cursor
+            )
         
         except TypeError:
             return JsonResponse({'MESSAGE': 'TYPE_ERROR'}, status=400)
+
+        except ValueError:
+            return JsonResponse({'MESSAGE': 'VALUE_ERROR'}, status=400)
         
         except Product.DoesNotExist:
             return JsonResponse({'MESSAGE': 'PRODUCT_NOT_EXIST'}, status=400)
@@ -133,59 +144,505 @@ class ProductDetailView(View):
         except AttributeError:
             return JsonResponse({'MESSAGE': 'ATTRIBUTE_ERROR'}, status=400)
 
-        return JsonResponse({'CLASS': product_info}, status=200)
+        return FastJsonResponse({'CLASS': product_info}, status=200)
+
+def get_detail_products(fields):
+    products = Product.objects.\
+        select_related(
+            'sub_category', 'difficulty', 'creator', 'signature',
+        ).\
+        prefetch_related(*[
+            prefetch for field, prefetch in PRODUCT_DETAIL_PREFETCHES.items() if field in fields
+        ])
+
+    if 'likeCount' in fields:
+        products = products.annotate(like_count=count_subquery(
+            ProductLike.objects.filter(product_id=OuterRef('id')), 'product_id'
+        ))
+
+    if 'curriculum' not in fields:
+        products = products.defer('curriculum')
+
+    return products
+
+def serialize_product_detail(
+    product,
+    fields,
+    is_like             = False,
+    progress            = 0,
+    creator_communities = (),
+    communities         = (),
+    next_cursor         = None
+):
+    curriculum = None
+    if 'curriculum' in fields:
+        curriculum = product.curriculum if product.curriculum is not None else \
+                     refresh_curriculum(product.id)
+
+    product_info = {
+        'mainImage'       : product.thumbnail_image,
+        'subImages'       : [{
+                                'imageUrl' : sub_image.image_url
+                            } for sub_image in product.productsubimage_set.all()]
+                            if 'subImages' in fields else None,
+        'title'           : product.name,
+        'subCategoryName' : product.sub_category.name,
+        'classOwner'      : product.creator.nick_name if not product.signature else
+                            product.signature.name,
+        'isTakeClass'     : '바로 수강 가능' if product.start_date <= date.today() else
+                            str(product.start_date.month) + '월' + ' ' +
+                            str(product.start_date.day) + '일 부터 수강 가능',
+        'sale'            : int(product.sale * 100),
+        'price'           : '{:,}원'.format(int(product.final_price)),
+        'difficulty'      : f'{product.difficulty.name} 대상',
+        'likeCount'       : product.like_count if 'likeCount' in fields else None,
+        'isLike'          : is_like,
+        'progress'        : progress,
+        'curriculum'      : curriculum,
+        'kitInfo'         : [{
+                                'mainImageUrl' : kit.main_image_url,
+                                'kitName'      : kit.name,
+                                'description'  : kit.description,
+                                'subImageUrls' : [{
+                                                    'subImageUrl' : sub_image.image_url
+                                                    } for sub_image in kit.kitsubimageurl_set.all()]
+                            } for kit in product.kit.all()]
+                            if 'kitInfo' in fields else None,
+        'creatorInfo'     : creator_communities[0]['communityUserInfo']
+                            if creator_communities else {},
+        'creatorCommunity': creator_communities,
+        'community'       : communities,
+        'communityCursor' : next_cursor,
+        'classId'         : product.id
+    }
+
+    return {field: value for field, value in product_info.items() if field in fields}
+
+class ProductBatchView(ReplicaReadMixin, View):
+    @login_decorator(login_required=False)
+    def get(self, request):
+        try:
+            product_ids = [int(product_id) for product_id in request.GET['ids'].split(',')]
+
+            if len(product_ids) > PRODUCT_BATCH_MAX_SIZE:
+                return JsonResponse({'MESSAGE': 'TOO_MANY_PRODUCTS'}, status=400)
+
+            fields   = set(get_requested_fields(request, PRODUCT_BATCH_FIELDS))
+            products = get_detail_products(fields).in_bulk(product_ids)
+
+            # 커리큘럼이 아직 없는 상품은 상품마다 다시 만들지 않고 한 번에 채운다
+            if 'curriculum' in fields:
+                missing = [product for product in products.values() if product.curriculum is None]
+
+                if missing:
+                    refresh_curricula(missing)
+
+            liked_ids  = set()
+            progresses = {}
+            if request.user:
+                if 'isLike' in fields:
+                    liked_ids = set(ProductLike.objects.filter(
+                        user_id        = request.user.id,
+                        product_id__in = list(products)
+                    ).values_list('product_id', flat=True))
+
+                if 'progress' in fields:
+                    progresses = dict(ProductProgress.objects.filter(
+                        user_id        = request.user.id,
+                        product_id__in = list(products)
+                    ).values_list('product_id', 'percent'))
+
+            products_info = {
+                product_id : serialize_product_detail(
+                    products[product_id],
+                    fields,
+                    is_like  = product_id in liked_ids,
+                    progress = progresses.get(product_id, 0)
+                ) if product_id in products else None
+                for product_id in product_ids
+            }
+
+        except KeyError as e:
+            return JsonResponse({'MESSAGE': f'KEY_ERROR:{e}'}, status=400)
+
+        except ValueError:
+            return JsonResponse({'MESSAGE': 'VALUE_ERROR'}, status=400)
+
+        except AttributeError:
+            return JsonResponse({'MESSAGE': 'ATTRIBUTE_ERROR'}, status=400)
+
+        return FastJsonResponse({'CLASSES': products_info}, status=200)
+
+def get_user_info(post):
+    return {
+        'id'            : post.user.id,
+        'nick_name'     : post.user.nick_name,
+        'profile_image' : post.user.profile_image
+    }
+
+def get_creator_ids(product):
+    return [user_id for user_id in (product.creator_id, product.signature_id) if user_id]
+
+def encode_cursor(timestamp, object_id):
+    value = f'{timestamp.isoformat()}|{object_id}'
+    return base64.urlsafe_b64encode(value.encode('UTF-8')).decode('UTF-8')
+
+def decode_cursor(cursor):
+    try:
+        timestamp, object_id = \
+            base64.urlsafe_b64decode(cursor.encode('UTF-8')).decode('UTF-8').split('|')
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError
+    return datetime.fromisoformat(timestamp), int(object_id)
+
+def get_community_page(product_id, cursor=None, limit=COMMUNITY_PAGE_SIZE, user_ids=None):
+    communities = Community.objects.select_related('user').filter(
+        product_id=product_id
+    ).order_by('-updated_at', '-id')
+
+    if user_ids is not None:
+        communities = communities.filter(user_id__in=user_ids)
+
+    if cursor:
+        updated_at, community_id = decode_cursor(cursor)
+        communities = communities.filter(
+            Q(updated_at__lt=updated_at) |
+            Q(updated_at=updated_at, id__lt=community_id)
+        )
+
+    page        = list(communities[:limit + 1])
+    next_cursor = encode_cursor(page[limit - 1].updated_at, page[limit - 1].id) \
+                  if len(page) > limit else None
+
+    return [{
+        'communityUserInfo'     : get_user_info(community),
+        'communityCommentedDate': community.updated_at.strftime('%Y.%m.%d.'),
+        'comment'               : community.description,
+        'communityId'           : community.id,
+        'commentCount'          : community.comment_count,
+        'likeCount'             : community.like_count
+    } for community in page[:limit]], next_cursor
+
+class CommunityListView(ReplicaReadMixin, View):
+    def get(self, request, product_id):
+        try:
+            cursor  = request.GET.get('cursor')
+            limit   = min(int(request.GET.get('limit', COMMUNITY_PAGE_SIZE)), COMMUNITY_MAX_PAGE_SIZE)
+            product = Product.objects.only(
+                'id', 'creator_id', 'signature_id'
+            ).get(id=product_id)
+
+            if limit < 1:
+                raise ValueError
+
+            communities, next_cursor = get_community_page(
+                product.id,
+                cursor   = cursor,
+                limit    = limit,
+                user_ids = get_creator_ids(product) if request.GET.get('creator') else None
+            )
+
+        except Product.DoesNotExist:
+            return JsonResponse({'MESSAGE': 'PRODUCT_NOT_EXIST'}, status=400)
+
+        except ValueError:
+            return JsonResponse({'MESSAGE': 'VALUE_ERROR'}, status=400)
 
-def get_user_info(community):
-    return User.objects.values(
-                'id', 'nick_name', 'profile_image'
-           ).get(id=community.user_id)
+        return FastJsonResponse({'COMMUNITY': communities, 'nextCursor': next_cursor}, status=200)
+
+def serialize_lecture_comment(comment):
+    return {
+        'commentId'  : comment.id,
+        'content'    : comment.content,
+        'imageUrl'   : comment.image_url,
+        'userInfo'   : get_user_info(comment),
+        'createdAt'  : comment.created_at.strftime('%Y.%m.%d.'),
+        'replies'    : []
+    }
+
+def build_comment_tree(roots, replies):
+    nodes = {comment.id: serialize_lecture_comment(comment) for comment in roots}
+
+    # replies는 created_at 순서라 부모가 항상 먼저 nodes에 들어가 있음
+    for reply in replies:
+        node   = nodes[reply.id] = serialize_lecture_comment(reply)
+        parent = nodes.get(reply.parent_id) or nodes[reply.root_id]
+        parent['replies'].append(node)
+
+    return [nodes[comment.id] for comment in roots]
+
+class LectureCommentView(View):
+    def get(self, request, product_id, lecture_id):
+        try:
+            cursor = request.GET.get('cursor')
+            limit  = min(int(request.GET.get('limit', COMMENT_PAGE_SIZE)), COMMENT_MAX_PAGE_SIZE)
+
+            if limit < 1:
+                raise ValueError
+
+            if not Lecture.objects.filter(id=lecture_id, product_id=product_id).exists():
+                return JsonResponse({'MESSAGE': 'LECTURE_NOT_EXIST'}, status=400)
+
+            roots = LectureComment.objects.select_related('user').filter(
+                lecture_id = lecture_id,
+                root       = None
+            ).order_by('-created_at', '-id')
+
+            if cursor:
+                created_at, comment_id = decode_cursor(cursor)
+                roots = roots.filter(
+                    Q(created_at__lt=created_at) |
+                    Q(created_at=created_at, id__lt=comment_id)
+                )
+
+            roots       = list(roots[:limit + 1])
+            next_cursor = encode_cursor(roots[limit - 1].created_at, roots[limit - 1].id) \
+                          if len(roots) > limit else None
+            roots       = roots[:limit]
+
+            replies = LectureComment.objects.select_related('user').filter(
+                root_id__in = [comment.id for comment in roots]
+            ).order_by('created_at', 'id') if roots else []
+
+        except ValueError:
+            return JsonResponse({'MESSAGE': 'VALUE_ERROR'}, status=400)
+
+        return FastJsonResponse({
+            'COMMENTS'   : build_comment_tree(roots, replies),
+            'nextCursor' : next_cursor
+        }, status=200)
+
+    @login_decorator()
+    def post(self, request, product_id, lecture_id):
+        try:
+            data      = json.loads(request.body)
+            content   = data['content']
+            parent_id = int(data['parent_id']) if data.get('parent_id') is not None else None
+
+            if not Lecture.objects.filter(id=lecture_id, product_id=product_id).exists():
+                return JsonResponse({'MESSAGE': 'LECTURE_NOT_EXIST'}, status=400)
+
+            parent = LectureComment.objects.get(
+                id=parent_id, lecture_id=lecture_id
+            ) if parent_id else None
+
+            comment = LectureComment.objects.create(
+                content    = content,
+                image_url  = data.get('image_url'),
+                user_id    = request.user.id,
+                parent     = parent,
+                lecture_id = lecture_id
+            )
+
+        except json.JSONDecodeError as e:
+            return JsonResponse({'MESSAGE': f'JSON_DECODE_ERROR:{e}'}, status=400)
+
+        except KeyError as e:
+            return JsonResponse({'MESSAGE': f'KEY_ERROR:{e}'}, status=400)
+
+        except (TypeError, ValueError):
+            return JsonResponse({'MESSAGE': 'VALUE_ERROR'}, status=400)
+
+        except LectureComment.DoesNotExist:
+            return JsonResponse({'MESSAGE': 'PARENT_COMMENT_NOT_EXIST'}, status=400)
+
+        return JsonResponse({'MESSAGE': 'SUCCESS', 'commentId': comment.id}, status=201)
+
+def get_lecture_etag(lecture):
+    version = f'{lecture.id}:{lecture.updated_at.isoformat()}:' \
+              f'{lecture.content_updated_at.isoformat() if lecture.content_updated_at else ""}:' \
+              f'{lecture.content_count}'
+    return quote_etag(hashlib.md5(version.encode('UTF-8')).hexdigest())
+
+class LectureDetailView(View):
+    @login_decorator()
+    def get(self, request, product_id, lecture_id):
+        try:
+            if not Product.objects.filter(
+                Q(creator_id=request.user.id) | Q(userproduct__user_id=request.user.id),
+                id = product_id
+            ).exists():
+                return JsonResponse({'MESSAGE': 'NOT_OWNED_PRODUCT'}, status=403)
+
+            lecture = Lecture.objects.select_related('video').annotate(
+                content_updated_at = Max('lecturecontent__updated_at'),
+                content_count      = Count('lecturecontent')
+            ).get(id=lecture_id, product_id=product_id)
+
+            etag = get_lecture_etag(lecture)
+
+            if etag in parse_etags(request.headers.get('If-None-Match', '')):
+                response         = HttpResponseNotModified()
+                response['ETag'] = etag
+                return response
+
+            contents = LectureContent.objects.select_related(
+                'description', 'image_url'
+            ).filter(lecture_id=lecture.id).order_by('order')
+
+            lecture_info = {
+                'lectureId' : lecture.id,
+                'title'     : lecture.name,
+                'videoUrl'  : lecture.video.video_url if lecture.video else None,
+                'contents'  : [{
+                                  'order'       : content.order,
+                                  'description' : content.description.description
+                                                  if content.description else None,
+                                  'imageUrl'    : content.image_url.image_url
+                                                  if content.image_url else None
+                              } for content in contents]
+            }
+
+        except Lecture.DoesNotExist:
+            return JsonResponse({'MESSAGE': 'LECTURE_NOT_EXIST'}, status=400)
+
+        response         = FastJsonResponse({'LECTURE': lecture_info}, status=200)
+        response['ETag'] = etag
+        return response
+
+class LectureProgressView(View):
+    @login_decorator()
+    def post(self, request, product_id, lecture_id):
+        try:
+            data            = json.loads(request.body)
+            watched_seconds = int(data['watched_seconds'])
+            is_completed    = data.get('is_completed', False)
+
+            # bool("false") 는 True 이므로 JSON true/false 만 받는다
+            if watched_seconds < 0 or not isinstance(is_completed, bool):
+                raise ValueError
+
+            if get_lecture_product_id(lecture_id) != product_id:
+                return JsonResponse({'MESSAGE': 'LECTURE_NOT_EXIST'}, status=400)
+
+            if not Product.objects.filter(
+                Q(creator_id=request.user.id) | Q(userproduct__user_id=request.user.id),
+                id = product_id
+            ).exists():
+                return JsonResponse({'MESSAGE': 'NOT_OWNED_PRODUCT'}, status=403)
+
+            record_heartbeat(
+                request.user.id, product_id, lecture_id, watched_seconds, is_completed
+            )
+
+        except json.JSONDecodeError as e:
+            return JsonResponse({'MESSAGE': f'JSON_DECODE_ERROR:{e}'}, status=400)
+
+        except KeyError as e:
+            return JsonResponse({'MESSAGE': f'KEY_ERROR:{e}'}, status=400)
+
+        except (TypeError, ValueError):
+            return JsonResponse({'MESSAGE': 'VALUE_ERROR'}, status=400)
+
+        return JsonResponse({'MESSAGE': 'SUCCESS'}, status=202)
+
+MAIN_PRODUCT_FIELDS = {
+    'created_at'  : (['created_at'], lambda product: product.created_at),
+    'id'          : (['id'], lambda product: product.id),
+    'title'       : (['name'], lambda product: product.name),
+    'thumbnail'   : (['thumbnail_image'], lambda product: product.thumbnail_image),
+    'subCategory' : (['sub_category__name'], lambda product: product.sub_category.name),
+    'creator'     : (['creator__name'], lambda product: product.creator.name),
+    'isLiked'     : ([], lambda product: False), #True if product.product_like_user.exists() else False, 
+    #모르겠습니다..새로운 로그인 데코레이터도 적용해야하는데.. 그래야 이게 말이 되는데,, 지금은 로그인 안해서, 좋아요를 못하는 상황...
+    'likeCount'   : ([], lambda product: product.likecount),
+    'price'       : (['price'], lambda product: int(product.price)),
+    'sale'        : (['sale'], lambda product: product.sale),
+    'finalPrice'  : (['final_price'], lambda product: int(product.final_price))
+}
+
+def serialize_main_product(product, fields):
+    return {field: MAIN_PRODUCT_FIELDS[field][1](product) for field in fields}
+
+def get_keyset_page(products, ordering, last=None):
+    # MySQLdb 는 결과를 전부 받아 두므로 (정렬 값, id) 를 기준으로 MAIN_PAGE_STREAM_CHUNK_SIZE 씩 끊어 읽는다
+    field      = ordering.lstrip('-')
+    descending = ordering.startswith('-')
+    lookup     = 'lt' if descending else 'gt'
+    products   = products.annotate(keyset_value=F(field)).order_by(ordering, '-id' if descending else 'id')
+
+    if last:
+        products = products.filter(
+            Q(**{f'{field}__{lookup}': last.keyset_value}) |
+            Q(**{field: last.keyset_value, f'id__{lookup}': last.id})
+        )
+
+    return list(products[:MAIN_PAGE_STREAM_CHUNK_SIZE])
+
+def stream_main_products(products, ordering, fields, page):
+    while page:
+        for product in page:
+            yield serialize_main_product(product, fields)
+
+        page = get_keyset_page(products, ordering, page[-1]) \
+            if len(page) == MAIN_PAGE_STREAM_CHUNK_SIZE else []
+
+class MainPageView(ReplicaReadMixin, ConditionalGetMixin, View):
+    def get_version(self, request):
+        return get_catalog_version()
 
-class MainPageView(View):
     def get(self, request):
         try:
             sorting          = request.GET.get('sorting')
             main_category_id = request.GET.get('main')
             sub_category_id  = request.GET.get('sub')
+            difficulty_id    = request.GET.get('difficulty')
+            min_price        = request.GET.get('min_price')
+            max_price        = request.GET.get('max_price')
+            stream           = request.GET.get('stream') == 'true'
+        
+            fields           = get_requested_fields(request, MAIN_PRODUCT_FIELDS)
         
-            products = Product.objects.select_related(
-                'main_category',
-                'sub_category',
-                'creator'
-                ).prefetch_related(
-                    'product_like_user',
-                    'product_view_user'
-                    ).annotate(likecount=Count('product_like_user'))
+            products = get_projected_queryset(Product.objects.all(), fields, MAIN_PRODUCT_FIELDS)
+
+            if 'likeCount' in fields or sorting == 'popular':
+                products = products.annotate(likecount=Count('product_like_user'))
 
             filters = {}
 
             if main_category_id:
-                filters['main_category__id'] = main_category_id
+                filters['main_category_id'] = int(main_category_id)
 
             if sub_category_id:
-                filters['sub_category__id'] = sub_category_id
+                filters['sub_category_id'] = int(sub_category_id)
+
+            if difficulty_id:
+                filters['difficulty_id'] = int(difficulty_id)
+
+            if min_price:
+                filters['final_price__gte'] = int(min_price)
+
+            if max_price:
+                filters['final_price__lte'] = int(max_price)
 
             sortings   = {
-                'updated' : '-created_at',
-                'popular' : '-likecount'
+                'updated'    : '-created_at',
+                'popular'    : '-likecount',
+                'price_asc'  : 'final_price',
+                'price_desc' : '-final_price',
+                'sale'       : '-sale'
             }
 
             if sorting in sortings:
                 products = products.order_by(sortings[sorting])
 
-            products_list = [{
-                'created_at'  : product.created_at,
-                'id'          : product.id,
-                'title'       : product.name,
-                'thumbnail'   : product.thumbnail_image,
-                'subCategory' : product.sub_category.name,
-                'creator'     : product.creator.name,
-                'isLiked'     : False, #True if product.product_like_user.exists() else False, 
-                #모르겠습니다..새로운 로그인 데코레이터도 적용해야하는데.. 그래야 이게 말이 되는데,, 지금은 로그인 안해서, 좋아요를 못하는 상황...
-                'likeCount'   : product.likecount,
-                'price'       : int(product.price),
-                'sale'        : product.sale,
-                'finalPrice'  : round(int(product.price * (1-product.sale)),2)
-            } for product in products.filter(**filters)]
+            products = products.filter(**filters)
+
+            if stream:
+                # 첫 페이지는 뷰 안에서 읽어 빈 결과면 스트리밍하지 않는다. 이후 페이지도 같은 DB 에서 읽도록 고정한다
+                products = products.using(products.db)
+                ordering = sortings.get(sorting, 'id')
+                page     = get_keyset_page(products, ordering)
+
+                if not page:
+                    return JsonResponse({'MESSAGE': 'NO_RESULT'}, status=400)
+
+                return StreamingJsonResponse(
+                    stream_main_products(products, ordering, fields, page),
+                    'RESULT'
+                )
+
+            products_list = [serialize_main_product(product, fields) for product in products]
 
             if not products_list:
                 return JsonResponse({'MESSAGE': 'NO_RESULT'}, status=400)
@@ -193,6 +650,8 @@ class MainPageView(View):
             return JsonResponse({'MESSAGE': f'KEY_ERROR:{e}'}, status=400)
         except TypeError:
             return JsonResponse({'MESSAGE': 'TYPE_ERROR'}, status=400)
+        except ValueError:
+            return JsonResponse({'MESSAGE': 'VALUE_ERROR'}, status=400)
         except json.JSONDecodeError as e :
             return JsonResponse({'MESSAGE': f'JSON_DECODE_ERROR:{e}'}, status=400)
-        return JsonResponse({'RESULT': products_list}, status=200)
+        return FastJsonResponse({'RESULT': products_list}, status=200)
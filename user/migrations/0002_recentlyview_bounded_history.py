@@ -0,0 +1,50 @@
+# Generated by Django 3.1.3 on 2026-10-19 11:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+RECENTLY_VIEW_LIMIT = 20
+
+
+def trim_recently_views(apps, schema_editor):
+    RecentlyView = apps.get_model('user', 'RecentlyView')
+
+    kept         = {}
+    expired_ids  = []
+    rows         = RecentlyView.objects.order_by('user_id', '-id').values_list('id', 'user_id', 'product_id')
+
+    for view_id, user_id, product_id in rows.iterator():
+        products = kept.setdefault(user_id, set())
+
+        if product_id in products or len(products) >= RECENTLY_VIEW_LIMIT:
+            expired_ids.append(view_id)
+            continue
+
+        products.add(product_id)
+
+    for i in range(0, len(expired_ids), 1000):
+        RecentlyView.objects.filter(id__in=expired_ids[i:i + 1000]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recentlyview',
+            name='viewed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(trim_recently_views, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='recentlyview',
+            unique_together={('user', 'product')},
+        ),
+        migrations.AddIndex(
+            model_name='recentlyview',
+            index=models.Index(fields=['user', '-viewed_at'], name='recently_views_user_viewed_idx'),
+        ),
+    ]
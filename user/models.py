@@ -1,4 +1,7 @@
-from django.db import models
+from django.db    import models, transaction, IntegrityError
+from django.utils import timezone
+
+RECENTLY_VIEW_LIMIT = 20
 
 class User(models.Model):
     name                   = models.CharField(max_length=50)
@@ -9,10 +12,12 @@ class User(models.Model):
     is_creator             = models.BooleanField(default=False, null=True)
     profile_image          = models.URLField(max_length=1000, null=True)
     is_benefit             = models.BooleanField(default=False)
+    is_organization_admin  = models.BooleanField(default=False)
     point                  = models.IntegerField(default=0)
     etc_channel            = models.CharField(max_length=50, null=True)
     recommend              = models.ForeignKey('self', on_delete=models.SET_NULL, null=True)
     application_channel    = models.ForeignKey('user.ApplyChannel', on_delete=models.SET_NULL, null=True)
+    organization           = models.ForeignKey('user.Organization', on_delete=models.SET_NULL, null=True)
     coupon                 = models.ManyToManyField('user.Coupon', through='user.UserCoupon')
     recently_view          = models.ManyToManyField('product.Product', through='user.RecentlyView', related_name='product_view_user')
     user_product           = models.ManyToManyField('product.Product', through='user.UserProduct', related_name='product_buy_user')
@@ -31,6 +36,14 @@ class ApplyChannel(models.Model):
     class Meta:
         db_table = 'apply_channels'
 
+class Organization(models.Model):
+    name       = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, editable=True)
+
+    class Meta:
+        db_table = 'organizations'
+
 class Coupon(models.Model):
     name          = models.CharField(max_length=100)
     discount_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
@@ -51,12 +64,41 @@ class UserCoupon(models.Model):
     class Meta:
         db_table = 'users_coupons'
 
+class RecentlyViewManager(models.Manager):
+    def record(self, user_id, product_id):
+        if self.filter(user_id=user_id, product_id=product_id).update(viewed_at=timezone.now()):
+            return
+
+        try:
+            with transaction.atomic():
+                self.create(user_id=user_id, product_id=product_id)
+
+                # 유저당 최근 본 강의는 RECENTLY_VIEW_LIMIT 개까지만 유지.
+                # 트랜잭션 안의 읽기는 replica 로 가지 않으므로 방금 넣은 행까지 primary 에서 센다
+                expired_ids = list(
+                    self.filter(user_id=user_id).
+                    order_by('-viewed_at', '-id').
+                    values_list('id', flat=True)[RECENTLY_VIEW_LIMIT:]
+                )
+
+                if expired_ids:
+                    self.filter(id__in=expired_ids).delete()
+        except IntegrityError:
+            return
+
 class RecentlyView(models.Model):
-    user    = models.ForeignKey('user.User', on_delete=models.CASCADE)
-    product = models.ForeignKey('product.Product', on_delete=models.CASCADE)
+    user      = models.ForeignKey('user.User', on_delete=models.CASCADE)
+    product   = models.ForeignKey('product.Product', on_delete=models.CASCADE)
+    viewed_at = models.DateTimeField(default=timezone.now)
+
+    objects = RecentlyViewManager()
     
     class Meta:
-        db_table = 'recently_views'
+        db_table        = 'recently_views'
+        unique_together = ('user', 'product')
+        indexes         = [
+            models.Index(fields=['user', '-viewed_at'], name='recently_views_user_viewed_idx'),
+        ]
 
 class UserProduct(models.Model):
     user        = models.ForeignKey('user.User', on_delete=models.SET_NULL, null=True)
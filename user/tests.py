@@ -1,13 +1,18 @@
 import json
+import asyncio
 import bcrypt
+import httpx
 import jwt
 
 from datetime import date, timedelta
 
-from django.test import TestCase, Client
-from unittest.mock import MagicMock, patch
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, Client
+from django.urls import resolve
+from unittest import mock
+from unittest.mock import AsyncMock, patch
 
-from .models import User, ProductLike
+from .models import User, UserCoupon, UserProduct, Coupon, ProductLike, RecentlyView
 from kit.models import Kit
 from core.utils import (
     get_hashed_pw,
@@ -225,8 +230,8 @@ class UserLogInTest(TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), {'MESSAGE': 'KEY_ERROR'})
 
-    @patch('user.views.requests')
-    def test_post_kakao_login_success(self, mocked_request):
+    @patch('user.views.httpx.AsyncClient')
+    def test_post_kakao_login_success(self, mocked_client):
         class FakeResponse:
             def json(self):
                 return {
@@ -239,7 +244,7 @@ class UserLogInTest(TestCase):
                         'email': 'test@email.com',
                     }
                 }
-        mocked_request.get = MagicMock(return_value=FakeResponse())
+        mocked_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=FakeResponse())
         header = {'HTTP_Authorization': 'fake_token'}
         response = self.client.post(
             '/user/login/kakao', content_type='application/json', **header)
@@ -341,18 +346,127 @@ class ProductSearchTest(TestCase):
             'MESSAGE': 'NO_RESULT'
         }
         )
-                    'id': 1548993291, 
-                    'properties': {
-                        'nickname': 'test_nickname',
-                        'profile_image': 'test_image_url',
-                        },
-                    'kakao_account': {
-                        'email': 'test@email.com',
-                        }
-                    }
-        mocked_request.get = MagicMock(return_value = FakeResponse())
-        header = {'HTTP_Authorization':'fake_token'}
-        response = self.client.post('/user/login/kakao', content_type='application/json', **header)
+
+class TestKakaoLogInView(TransactionTestCase):
+    def setUp(self):
+        self.client = Client()
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute('set foreign_key_checks=0')
+            cursor.execute('truncate users')
+            cursor.execute('set foreign_key_checks=1')
+
+    @mock.patch('user.views.httpx.AsyncClient')
+    def test_kakao_login_success(self, mock_client):
+        kakao_response = mock.MagicMock()
+        kakao_response.json.return_value = {
+            'properties'    : {'nickname': '김민구', 'profile_image': 'image_url'},
+            'kakao_account' : {'email': 'mingu@kakao.com'}
+        }
+        mock_client.return_value.__aenter__.return_value.get = mock.AsyncMock(return_value=kakao_response)
+
+        response = self.client.post('/user/login/kakao', HTTP_AUTHORIZATION='kakao_token')
 
         self.assertEqual(response.status_code, 200)
-        self.assertContains(response, 'token')
+        self.assertEqual(json.loads(response.content)['name'], '김민구')
+        self.assertEqual(mock_client.call_args.kwargs['timeout'], 3)
+        self.assertTrue(asyncio.iscoroutinefunction(resolve('/user/login/kakao').func))
+
+    @mock.patch('user.views.httpx.AsyncClient')
+    def test_kakao_login_timeout(self, mock_client):
+        mock_client.return_value.__aenter__.return_value.get = mock.AsyncMock(
+            side_effect=httpx.ReadTimeout('timed out', request=httpx.Request('GET', 'https://kapi.kakao.com'))
+        )
+
+        response = self.client.post('/user/login/kakao', HTTP_AUTHORIZATION='kakao_token')
+
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(json.loads(response.content), {'MESSAGE': 'KAKAO_API_TIMEOUT'})
+
+class TestMyPageView(TransactionTestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user   = User.objects.create(name='김민구', nick_name='민구좌')
+        self.header = {'HTTP_Authorization': issue_token(self.user.id)}
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute('set foreign_key_checks=0')
+            cursor.execute('truncate users')
+            cursor.execute('truncate products')
+            cursor.execute('truncate users_products')
+            cursor.execute('truncate product_likes')
+            cursor.execute('truncate recently_views')
+            cursor.execute('truncate coupons')
+            cursor.execute('truncate users_coupons')
+            cursor.execute('truncate sub_categories')
+            cursor.execute('set foreign_key_checks=1')
+
+    def create_products(self, count, creator):
+        sub_category = SubCategory.objects.create(name='데이터/개발')
+
+        return [Product.objects.create(
+            name            = f'클래스{i}',
+            effective_time  = timedelta(days=30),
+            price           = 10000,
+            sale            = 0.05,
+            start_date      = date.today(),
+            thumbnail_image = 'test_thumbnail_image_url',
+            sub_category    = sub_category,
+            creator         = creator
+        ) for i in range(count)]
+
+    def test_my_page_section_paging_is_bounded(self):
+        for query in ['limit=0', 'limit=51', 'own_offset=-1', 'liked_offset=abc']:
+            response = self.client.get('/user/mypage?' + query, **self.header)
+
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['MESSAGE'], 'VALUE_ERROR')
+
+        response = self.client.get('/user/mypage?limit=50&own_offset=10', **self.header)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_my_page_hides_deleted_products(self):
+        product = Product.objects.create(
+            name            = '삭제된 클래스',
+            price           = 10000,
+            sale            = 0,
+            start_date      = date.today(),
+            thumbnail_image = 'test_thumbnail_image_url',
+            is_deleted      = True
+        )
+        UserProduct.objects.create(user=self.user, product=product)
+        ProductLike.objects.create(user=self.user, product=product)
+
+        response = self.client.get('/user/mypage', **self.header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['PROFILE']['orderNum'], 0)
+        self.assertEqual(response.json()['PROFILE']['likeNum'], 0)
+        self.assertEqual(response.json()['OWN_PRODUCT'], [])
+
+    def test_my_page_query_count_with_several_rows_per_section(self):
+        creator  = User.objects.create(name='송은우', nick_name='신의 코드 송은우', is_creator=True)
+        products = self.create_products(5, creator)
+        self.create_products(3, self.user)
+
+        for product in products:
+            UserProduct.objects.create(user=self.user, product=product)
+            ProductLike.objects.create(user=self.user, product=product)
+            RecentlyView.objects.record(self.user.id, product.id)
+            UserCoupon.objects.create(user=self.user, coupon=Coupon.objects.create(name='쿠폰'))
+
+        # 인증 1, 프로필 1, 만든/구매/최근 본/좋아요 클래스 각 1
+        with self.assertNumQueries(6):
+            response = self.client.get('/user/mypage', **self.header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['PROFILE']['couponNum'], 5)
+        self.assertEqual(response.json()['PROFILE']['orderNum'], 5)
+        self.assertEqual(response.json()['PROFILE']['likeNum'], 5)
+        self.assertEqual(len(response.json()['OWN_PRODUCT']), 5)
+        self.assertEqual(len(response.json()['RECENT_VIEW']), 5)
+        self.assertEqual(len(response.json()['LIKED']), 5)
+        self.assertEqual(len(response.json()['CREATED']), 3)
@@ -1,9 +1,11 @@
 from django.urls import path
-from .views import SignUpView, LogInView, KakaoLogInView, SearchView
+from core.utils import as_async_view
+from .views import SignUpView, LogInView, KakaoLogInView, SearchView, MyPageView
 
 urlpatterns = [
     path('/signup', SignUpView.as_view()),
     path('/login', LogInView.as_view()),
-    path('/login/kakao', KakaoLogInView.as_view()),
+    path('/login/kakao', as_async_view(KakaoLogInView)),
     path('/search', SearchView.as_view()),
+    path('/mypage', MyPageView.as_view()),
 ]
@@ -1,11 +1,22 @@
 import json
-import requests
+import httpx
+
+from datetime import datetime, timedelta
+
+from asgiref.sync import sync_to_async
 
 from django.views import View
 from django.http import JsonResponse
+from django.db.models import Q, Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 from my_settings import SECRET, ALGORITHM
-from .models import User
+from .models import User, UserCoupon, UserProduct, ProductLike
+from product.models import Product, ProductProgress
+from product.versions import get_catalog_version, get_user_version
+from core.conditional import ConditionalGetMixin
+from core.replicas import ReplicaReadMixin
+from core.responses import FastJsonResponse
 from core.utils import (
     get_hashed_pw,
     is_valid_name,
@@ -13,9 +24,32 @@ from core.utils import (
     is_valid_password,
     checkpw,
     issue_token,
-    login_decorator
+    login_decorator,
+    get_token_user_id,
+    get_requested_fields,
+    get_projected_queryset,
+    count_subquery
 )
 
+MY_PAGE_SECTION_LIMIT     = 10
+MY_PAGE_SECTION_MAX_LIMIT = 50
+
+KAKAO_USER_URL    = "https://kapi.kakao.com/v2/user/me"
+KAKAO_API_TIMEOUT = 3
+
+SEARCH_PRODUCT_FIELDS = {
+    'id'          : (['id'], lambda product: product.id),
+    'title'       : (['name'], lambda product: product.name),
+    'thumbnail'   : (['thumbnail_image'], lambda product: product.thumbnail_image),
+    'subCategory' : (['sub_category__name'], lambda product: product.sub_category.name),
+    'creator'     : (['creator__name'], lambda product: product.creator.name),
+    'isLiked'     : ([], lambda product: product.is_liked),
+    'likeCount'   : ([], lambda product: product.creator_like_count),
+    'price'       : (['price'], lambda product: int(product.price)),
+    'sale'        : (['sale'], lambda product: product.sale),
+    'finalPrice'  : (['final_price'], lambda product: int(product.final_price))
+}
+
 class SignUpView(View):
     def post(self, request):
         try:
@@ -76,30 +110,34 @@ class LogInView(View):
             return JsonResponse({"MESSAGE": f"KEY_ERROR:{e}"}, status=400)
 
 
+def get_or_create_kakao_user(kakao_response):
+    return User.objects.get_or_create(
+        name=kakao_response["properties"]["nickname"],
+        email=kakao_response["kakao_account"]["email"],
+        profile_image=kakao_response["properties"]["profile_image"],
+    )[0]
+
 class KakaoLogInView(View):
-    def post(self, request):
+    # urls 에서 as_async_view 로 감싸 async 로 실행한다. 카카오 응답을 기다리는 동안 워커를 붙잡지 않는다
+    async def post(self, request):
         try:
             access_token = request.headers.get("Authorization", None)
             
             if not access_token:
                 return JsonResponse({'MESSAGE': 'TOKEN_REQUIRED'}, status=400)
             
-            url     = "https://kapi.kakao.com/v2/user/me"
             headers = {
                 "Authorization": f"Bearer {access_token}"
             }
             
-            response   = requests.get(url, headers=headers).json()
+            async with httpx.AsyncClient(timeout=KAKAO_API_TIMEOUT) as client:
+                response = (await client.get(KAKAO_USER_URL, headers=headers)).json()
             
             if not 'email' in response['kakao_account']:
                 return JsonResponse({'MESSAGE': 'EMAIL_REQUIRED'}, status=405)
             
-            kakao_user = User.objects.get_or_create(
-                name=response["properties"]["nickname"],
-                email=response["kakao_account"]["email"],
-                profile_image=response["properties"]["profile_image"],
-            )[0]
-            token = issue_token(kakao_user.id)
+            kakao_user = await sync_to_async(get_or_create_kakao_user, thread_sensitive=True)(response)
+            token      = issue_token(kakao_user.id)
             
             return JsonResponse({"token": token, "name": kakao_user.name, "id": kakao_user.id}, status=200)
         
@@ -111,24 +149,34 @@ class KakaoLogInView(View):
             return JsonResponse({"MESSAGE": "TYPE_ERROR"}, status=400)
         except KeyError as e:
             return JsonResponse({"MESSAGE": f"KEY_ERROR:{e}"}, status=400)
+        except httpx.TimeoutException:
+            return JsonResponse({"MESSAGE": "KAKAO_API_TIMEOUT"}, status=504)
+        except httpx.HTTPError:
+            return JsonResponse({"MESSAGE": "KAKAO_API_ERROR"}, status=502)
+
+class SearchView(ReplicaReadMixin, ConditionalGetMixin, View):
+    def get_version(self, request):
+        return get_catalog_version()
 
-class SearchView(View):
     def get(self, request):
         try:
             search          = request.GET.get('search')
             sorting         = request.GET.get('sorting')
             sub_category_id = request.GET.get('sub_category')
             
-            products = Product.objects.select_related(
-                'main_category',
-                'sub_category',
-                'creator'
-                ).prefetch_related(
-                    'kit', 
-                    'detail_category',
-                    'product_like_user',
-                    'product_view_user'
-                    )
+            fields          = get_requested_fields(request, SEARCH_PRODUCT_FIELDS)
+            
+            products = get_projected_queryset(Product.objects.all(), fields, SEARCH_PRODUCT_FIELDS)
+
+            if 'isLiked' in fields:
+                products = products.annotate(is_liked=Exists(
+                    ProductLike.objects.filter(product_id=OuterRef('id'))
+                ))
+
+            if 'likeCount' in fields:
+                products = products.annotate(creator_like_count=count_subquery(
+                    ProductLike.objects.filter(user_id=OuterRef('creator_id')), 'user_id'
+                ))
 
             filters = {}
 
@@ -161,53 +209,100 @@ class SearchView(View):
                 return JsonResponse({'MESSAGE': 'WRONG_KEY'}, status=400)
                 
             search_list = [{
-                'id'          : product.id,
-                'title'       : product.name,
-                'thumbnail'   : product.thumbnail_image,
-                'subCategory' : product.sub_category.name,
-                'creator'     : product.creator.name,
-                'isLiked'     : True if ProductLike.objects.filter(product_id=product.id).exists() else False,
-                'likeCount'   : product.creator.product_like.all().count(),
-                'price'       : int(product.price),
-                'sale'        : product.sale,
-                'finalPrice'  : round(int(product.price * (1-product.sale)),2)
+                field: SEARCH_PRODUCT_FIELDS[field][1](product) for field in fields
             } for product in products.filter(q, **filters)]
 
             if not search_list:
                 return JsonResponse({'MESSAGE': 'NO_RESULT'}, status=400)
-            return JsonResponse({'search_result': search_list}, status=200)
+            return FastJsonResponse({'search_result': search_list}, status=200)
         except KeyError as e :
             return JsonResponse({'MESSAGE': f'KEY_ERROR:{e}'}, status=400)
         except TypeError:
             return JsonResponse({'MESSAGE': 'TYPE_ERROR'}, status=400)
         except json.JSONDecodeError as e :
             return JsonResponse({"MESSAGE": f"JSON_ERROR:{e}"}, status=400)
+        except ValueError:
+            return JsonResponse({'MESSAGE': 'VALUE_ERROR'}, status=400)
+
+class MyPageView(ReplicaReadMixin, ConditionalGetMixin, View):
+    def get_version(self, request):
+        user_id = get_token_user_id(request)
+
+        if not user_id:
+            return None
+
+        return get_user_version(user_id)
 
-class MyPageView(View):
     @login_decorator()
     def get(self, request):
         try:
-            user = request.user
+            user   = request.user
+            limit  = int(request.GET.get('limit', MY_PAGE_SECTION_LIMIT))
+            offset = {
+                section: int(request.GET.get(f'{section}_offset', 0))
+                for section in ['own', 'recent', 'liked', 'created']
+            }
+
+            if not 1 <= limit <= MY_PAGE_SECTION_MAX_LIMIT or min(offset.values()) < 0:
+                raise ValueError
+
+            user_object = User.objects.annotate(
+                coupon_count = count_subquery(
+                    UserCoupon.objects.filter(user_id=OuterRef('id')), 'user_id'
+                ),
+                like_count   = count_subquery(
+                    ProductLike.objects.filter(user_id=OuterRef('id'), product__is_deleted=False), 'user_id'
+                ),
+                order_count  = count_subquery(
+                    UserProduct.objects.filter(user_id=OuterRef('id'), product__is_deleted=False), 'user_id'
+                )
+            ).get(id=user.id)
 
-            user_object = User.objects.prefetch_related('coupon','recently_view__product_like_user','product_like__product_like_user','user_product','recently_view__sub_category','recently_view__creator','product_like__sub_category','product_like__creator').get(id=user.id)
-        
             user_profile = {
                 'id'          : user_object.id,
                 'name'        : user_object.name,
                 'profileImage': user_object.profile_image,
                 'email'       : user_object.email,
                 'point'       : user_object.point,
-                'couponNum'   : user_object.coupon.count(),
-                'likeNum'     : user_object.product_like.count(),
-                'orderNum'    : user_object.user_product.count()
+                'couponNum'   : user_object.coupon_count,
+                'likeNum'     : user_object.like_count,
+                'orderNum'    : user_object.order_count
             }
 
-            created_product_list = Product.objects.select_related(
-                'creator').filter(creator=user.id)
-                
-            own_product_list     = user_object.user_product.all()
-            recently_viewed_list = user_object.recently_view.all()
-            like_product_list    = user_object.product_like.all()
+            product_cards = Product.objects.select_related(
+                'sub_category', 'creator'
+            ).defer('curriculum').annotate(
+                like_count = count_subquery(
+                    ProductLike.objects.filter(product_id=OuterRef('id')), 'product_id'
+                ),
+                is_liked   = Exists(
+                    ProductLike.objects.filter(user_id=user.id, product_id=OuterRef('id'))
+                )
+            )
+
+            created_product_list = Product.objects.defer('curriculum').filter(
+                creator_id=user.id
+            ).order_by('-created_at')[offset['created']:offset['created'] + limit]
+
+            # 구매 내역은 상품 기본 매니저를 거치지 않으므로 삭제된 상품을 직접 거른다
+            own_product_list     = UserProduct.objects.select_related('product').filter(
+                user_id=user.id, product__is_deleted=False
+            ).annotate(
+                progress = Coalesce(Subquery(
+                    ProductProgress.objects.filter(
+                        user_id    = OuterRef('user_id'),
+                        product_id = OuterRef('product_id')
+                    ).values('percent')[:1]
+                ), 0)
+            ).order_by('-created_at')[offset['own']:offset['own'] + limit]
+
+            recently_viewed_list = product_cards.filter(
+                recentlyview__user_id=user.id
+            ).order_by('-recentlyview__viewed_at')[offset['recent']:offset['recent'] + limit]
+
+            like_product_list    = product_cards.filter(
+                productlike__user_id=user.id
+            ).order_by('-productlike__created_at')[offset['liked']:offset['liked'] + limit]
 
             created_list = [{
                 'classId'    : created.id,
@@ -215,17 +310,18 @@ class MyPageView(View):
                 'thumbnail'  : created.thumbnail_image,
                 'price'      : created.price,
                 'sale'       : int(created.sale*100),
-                'finalPrice' : round(int(created.price * (1-created.sale)), 2),
+                'finalPrice' : int(created.final_price),
             } for created in created_product_list]
 
             own_list = [{
-                'classId'       : own_product.id,
-                'title'         : own_product.name,
-                'thumbnail'     : own_product.thumbnail_image,
-                'effectiveDate' : '평생 수강 쌉가능' if not own_product.effective_time else
-                str(((own_product.created_at + own_product.effective_time) -
+                'classId'       : own.product.id,
+                'title'         : own.product.name,
+                'thumbnail'     : own.product.thumbnail_image,
+                'effectiveDate' : '평생 수강 쌉가능' if not own.product.effective_time else
+                str(((own.created_at + own.product.effective_time) -
                      datetime.today() + timedelta(days=1)).days) + '일 남음',
-            } for own_product in own_product_list]
+                'progress'      : own.progress,
+            } for own in own_product_list]
 
             viewed_list = [{
                 'classId'     : recent.id,
@@ -233,11 +329,11 @@ class MyPageView(View):
                 'thumbnail'   : recent.thumbnail_image,
                 'subCategory' : recent.sub_category.name,
                 'creator'     : recent.creator.name,
-                'isLiked'     : True if recent.product_like_user.exists() else False,
-                'likeCount'   : recent.product_like_user.all().count(),
+                'isLiked'     : recent.is_liked,
+                'likeCount'   : recent.like_count,
                 'price'       : recent.price,
                 'sale'        : int((recent.sale)*100),
-                'finalPrice'  : round(int(recent.price * (1-recent.sale)), 2),
+                'finalPrice'  : int(recent.final_price),
             } for recent in recently_viewed_list]
 
             liked_list = [{
@@ -246,21 +342,17 @@ class MyPageView(View):
                 'thumbnail'   : like_product.thumbnail_image,
                 'subCategory' : like_product.sub_category.name,
                 'creator'     : like_product.creator.name,
-                'isLiked'     : True if like_product else False,
-                'likeCount'   : like_product.product_like_user.all().count(),
+                'isLiked'     : True,
+                'likeCount'   : like_product.like_count,
                 'price'       : like_product.price,
                 'sale'        : int((like_product.sale)*100),
-                'finalPrice'  : round(int(like_product.price * (1-like_product.sale)), 2),
+                'finalPrice'  : int(like_product.final_price),
             } for like_product in like_product_list]
 
-            return JsonResponse({'PROFILE': user_profile, 'OWN_PRODUCT': own_list, 'RECENT_VIEW': viewed_list, 'CREATED': created_list, 'LIKED': liked_list}, status=200)
+            return FastJsonResponse({'PROFILE': user_profile, 'OWN_PRODUCT': own_list, 'RECENT_VIEW': viewed_list, 'CREATED': created_list, 'LIKED': liked_list}, status=200)
         except User.DoesNotExist:
             return JsonResponse({'MESSAGE': 'INVALID_USER'}, status=400)
-        except Product.DoesNotExist:
-            return JsonResponse({'MESSAGE': 'INVALID_PRODUCT'}, status=400)
-        except RecentlyView.DoesNotExist:
-            return JsonResponse({'MESSAGE': 'INVALID_OBJECT'}, status=400)
-        except KeyError as e:
-            return JsonResponse({'MESSAGE': f'KEY_ERROR:{e}'}, status=400)
-        except json.JSONDecodeError as e:
-            return JsonResponse({'MESSAGE': f'JSON_DECODE_ERROR:{e}'}, status=400)
+        except ValueError:
+            return JsonResponse({'MESSAGE': 'VALUE_ERROR'}, status=400)
+        except AttributeError:
+            return JsonResponse({'MESSAGE': 'ATTRIBUTE_ERROR'}, status=400)